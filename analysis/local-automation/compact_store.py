@@ -0,0 +1,270 @@
+import glob
+import json
+import os
+import sqlite3
+import sys
+
+import numpy as np
+import pandas as pd
+
+# --- Penyimpanan History Ringkas (Delta/XOR + Kompresi Blok) ---
+# Atribut statis koin (name, symbol, slug) disimpan sekali di tabel dimensi coins.csv.
+# Nilai per snapshot disimpan per hari (satu blok .npz) sebagai matriks snapshot x koin:
+# - harga, volume, market cap, dan persentase: bit float64 di-XOR dengan snapshot sebelumnya
+#   lalu byte-nya diacak (byte shuffle) agar byte yang sama berdekatan;
+# - cmc_rank dan waktu: delta terhadap snapshot sebelumnya;
+# lalu seluruh blok dikompresi (deflate).
+# Satu hari bisa terdiri dari beberapa segmen ({hari}.{nomor}.npz): baris baru ditambahkan ke
+# segmen terakhir selama segmen itu masih kecil, lalu segmen baru dimulai.
+
+FLOAT_COLUMNS = [
+    'price', 'volume_24h', 'market_cap',
+    'percent_change_1h', 'percent_change_24h', 'percent_change_7d'
+]
+PRICE_COLUMNS = [
+    'id', 'name', 'symbol', 'slug', 'cmc_rank', 'price', 'volume_24h', 'market_cap',
+    'percent_change_1h', 'percent_change_24h', 'percent_change_7d', 'last_updated', 'timestamp'
+]
+COINS_FILE = 'coins.csv'
+# Watermark ekspor (rowid terakhir crypto_prices yang sudah disalin)
+STATE_FILE = 'export_state.json'
+# Segmen yang sudah berisi sekian baris tidak ditulis ulang lagi; append berikutnya membuat segmen baru
+SEGMENT_ROWS = 50_000
+
+
+# --- Encoding kolom ---
+def xor_encode(matrix):
+    """XOR bit float64 setiap baris dengan baris sebelumnya, lalu byte shuffle."""
+    bits = np.ascontiguousarray(matrix, dtype=np.float64).view(np.uint64)
+    encoded = bits.copy()
+    encoded[1:] ^= bits[:-1]
+    return np.ascontiguousarray(encoded.view(np.uint8).reshape(bits.shape + (8,)).transpose(2, 0, 1))
+
+def xor_decode(shuffled):
+    """Kebalikan xor_encode."""
+    encoded = np.ascontiguousarray(shuffled.transpose(1, 2, 0)).view(np.uint64)[..., 0]
+    return np.bitwise_xor.accumulate(encoded, axis=0).view(np.float64)
+
+def delta_encode(matrix):
+    encoded = matrix.copy()
+    encoded[1:] -= matrix[:-1]
+    return encoded
+
+def delta_decode(encoded):
+    return np.cumsum(encoded, axis=0, dtype=encoded.dtype)
+
+def _fill_forward(matrix, present):
+    """Sel kosong diisi nilai snapshot sebelumnya agar delta/XOR-nya nol."""
+    filled = matrix.copy()
+    for row in range(1, len(filled)):
+        missing = ~present[row]
+        filled[row, missing] = filled[row - 1, missing]
+    return filled
+
+def _to_micros(values):
+    return pd.DatetimeIndex(pd.to_datetime(values, format='ISO8601', utc=True)).as_unit('us').asi8
+
+def _micros_to_local_iso(micros):
+    # Kolom timestamp di crypto_prices berasal dari datetime.now().isoformat() (tanpa zona waktu)
+    return [value.isoformat() for value in pd.to_datetime(micros, unit='us').to_pydatetime()]
+
+def _micros_to_cmc_iso(micros, null):
+    # Format last_updated dari API CMC, misalnya 2025-08-09T17:32:00.000Z; NULL menjadi None
+    values = pd.to_datetime(micros, unit='us').strftime('%Y-%m-%dT%H:%M:%S.%f')
+    return [None if missing else value[:-3] + 'Z' for value, missing in zip(values, null)]
+
+
+# --- Blok ---
+def encode_block(df):
+    """
+    Mengubah baris crypto_prices (DataFrame) menjadi dict array terenkode untuk satu blok.
+    Timestamp disimpan dalam mikrodetik; timestamp lokal tanpa zona waktu diperlakukan apa adanya.
+    Satu snapshot = satu timestamp persis. Jika koin yang sama muncul lebih dari sekali pada
+    timestamp yang sama, kemunculan berikutnya mendapat baris snapshot sendiri (waktu sama),
+    sehingga tidak ada baris yang tertimpa.
+    """
+    timestamps = _to_micros(df['timestamp'].str.replace('Z', '', regex=False))
+    ids = df['id'].to_numpy(dtype=np.int64)
+    occurrence = pd.DataFrame({'timestamp': timestamps, 'id': ids}).groupby(['timestamp', 'id']).cumcount()
+
+    snapshot_keys, snapshot_rows = np.unique(
+        np.column_stack([timestamps, occurrence.to_numpy(dtype=np.int64)]), axis=0, return_inverse=True
+    )
+    snapshot_times = snapshot_keys[:, 0]
+    snapshot_rows = snapshot_rows.reshape(-1)
+    coin_ids, coin_cols = np.unique(ids, return_inverse=True)
+    shape = (len(snapshot_times), len(coin_ids))
+
+    present = np.zeros(shape, dtype=bool)
+    present[snapshot_rows, coin_cols] = True
+    rank_null = np.zeros(shape, dtype=bool)
+    rank_null[snapshot_rows, coin_cols] = df['cmc_rank'].isna().to_numpy()
+    last_updated_null = np.zeros(shape, dtype=bool)
+    last_updated_null[snapshot_rows, coin_cols] = df['last_updated'].isna().to_numpy()
+    # NULL last_updated disimpan sebagai 0 (nilainya hanya pengisi, seperti cmc_rank)
+    last_updated = np.where(last_updated_null[snapshot_rows, coin_cols], 0, _to_micros(df['last_updated']))
+
+    def to_matrix(values, dtype, fill):
+        matrix = np.full(shape, fill, dtype=dtype)
+        matrix[snapshot_rows, coin_cols] = values
+        return _fill_forward(matrix, present)
+
+    arrays = {
+        'rows': np.array(len(df)),
+        'coin_ids': coin_ids,
+        'snapshot_times': delta_encode(snapshot_times),
+        'present': np.packbits(present, axis=None),
+        # NULL rank disimpan sebagai mask terpisah; nilainya di matriks hanya pengisi
+        'cmc_rank_null': np.packbits(rank_null, axis=None),
+        'cmc_rank': delta_encode(to_matrix(df['cmc_rank'].fillna(0).to_numpy(dtype=np.int64), np.int64, 0)),
+        'last_updated_null': np.packbits(last_updated_null, axis=None),
+        'last_updated': delta_encode(to_matrix(last_updated, np.int64, 0)),
+    }
+    for column in FLOAT_COLUMNS:
+        arrays[column] = xor_encode(to_matrix(df[column].to_numpy(dtype=np.float64), np.float64, 0.0))
+    return arrays
+
+def decode_block(arrays, coins):
+    """Mengembalikan baris crypto_prices (DataFrame) dari array blok dan tabel dimensi koin."""
+    coin_ids = arrays['coin_ids']
+    snapshot_times = delta_decode(arrays['snapshot_times'])
+    shape = (len(snapshot_times), len(coin_ids))
+    present = np.unpackbits(arrays['present'], count=shape[0] * shape[1]).reshape(shape).astype(bool)
+    rank_null = np.unpackbits(arrays['cmc_rank_null'], count=shape[0] * shape[1]).reshape(shape).astype(bool)
+    last_updated_null = np.unpackbits(
+        arrays['last_updated_null'], count=shape[0] * shape[1]
+    ).reshape(shape).astype(bool)
+    rows, cols = np.nonzero(present)
+
+    ids = coin_ids[cols]
+    attributes = coins.reindex(ids)
+    ranks = pd.array(delta_decode(arrays['cmc_rank'])[rows, cols], dtype='Int64')
+    ranks[rank_null[rows, cols]] = pd.NA
+
+    df = pd.DataFrame({
+        'id': ids,
+        'name': attributes['name'].to_numpy(),
+        'symbol': attributes['symbol'].to_numpy(),
+        'slug': attributes['slug'].to_numpy(),
+        'cmc_rank': ranks,
+    })
+    for column in FLOAT_COLUMNS:
+        df[column] = xor_decode(arrays[column])[rows, cols]
+    df['last_updated'] = _micros_to_cmc_iso(
+        delta_decode(arrays['last_updated'])[rows, cols], last_updated_null[rows, cols]
+    )
+    df['timestamp'] = _micros_to_local_iso(snapshot_times[rows])
+    return df[PRICE_COLUMNS]
+
+
+# --- Store di disk ---
+def load_coins(root):
+    """Tabel dimensi koin (index: id)."""
+    path = os.path.join(root, COINS_FILE)
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=['name', 'symbol', 'slug'], index=pd.Index([], name='id'))
+    return pd.read_csv(path, index_col='id', keep_default_na=False)
+
+def save_coins(root, df):
+    """Menggabungkan atribut koin dari `df` ke tabel dimensi (atribut terbaru yang dipakai)."""
+    coins = load_coins(root)
+    latest = df.drop_duplicates(subset='id', keep='last').set_index('id')[['name', 'symbol', 'slug']]
+    coins = pd.concat([coins[~coins.index.isin(latest.index)], latest]).sort_index()
+    coins.to_csv(os.path.join(root, COINS_FILE))
+
+def _segments(root, day):
+    return sorted(glob.glob(os.path.join(root, f"{day}.*.npz")))
+
+def write_rows(root, df):
+    """
+    Menambahkan baris crypto_prices ke store: blok per hari (tanggal timestamp), berupa segmen.
+    Baris baru hanya digabung dengan segmen terakhir hari itu jika segmen tersebut masih di bawah
+    SEGMENT_ROWS baris; selain itu ditulis sebagai segmen baru. Segmen lain tidak disentuh, jadi
+    biaya append dibatasi ukuran segmen, bukan ukuran seluruh hari.
+    """
+    os.makedirs(root, exist_ok=True)
+    save_coins(root, df)
+    coins = load_coins(root)
+    days = df['timestamp'].str[:10]
+    for day, rows in df.groupby(days, sort=True):
+        segments = _segments(root, day)
+        sequence = len(segments)
+        if segments and _segment_rows(segments[-1]) < SEGMENT_ROWS:
+            sequence -= 1
+            rows = pd.concat([read_block(segments[-1], coins), rows], ignore_index=True)
+        for start in range(0, len(rows), SEGMENT_ROWS):
+            path = os.path.join(root, f"{day}.{sequence:04d}.npz")
+            tmp_path = path + '.tmp.npz'
+            np.savez_compressed(tmp_path, **encode_block(rows.iloc[start:start + SEGMENT_ROWS]))
+            os.replace(tmp_path, path)
+            sequence += 1
+
+def _segment_rows(path):
+    with np.load(path) as arrays:
+        return int(arrays['rows'])
+
+def read_block(path, coins):
+    with np.load(path) as arrays:
+        return decode_block(arrays, coins)
+
+def read_range(root, start=None, end=None):
+    """
+    Membaca baris crypto_prices antara `start` dan `end` (string ISO, inklusif).
+    Hanya blok hari yang beririsan dengan rentang yang dibuka dan didekode.
+    """
+    coins = load_coins(root)
+    frames = []
+    for path in sorted(glob.glob(os.path.join(root, '*.npz'))):
+        day = os.path.basename(path)[:10]
+        if (start and day < start[:10]) or (end and day > end[:10]):
+            continue
+        frame = read_block(path, coins)
+        if start:
+            frame = frame[frame['timestamp'] >= start]
+        if end:
+            frame = frame[frame['timestamp'] <= end]
+        frames.append(frame)
+    if not frames:
+        return pd.DataFrame(columns=PRICE_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+def _load_watermark(root):
+    try:
+        with open(os.path.join(root, STATE_FILE)) as f:
+            return json.load(f)['last_rowid']
+    except (OSError, ValueError, KeyError):
+        return 0
+
+def export_db(db_path, root):
+    """
+    Menyalin baris crypto_prices yang belum diekspor (rowid di atas watermark) ke store ringkas.
+    Mengembalikan jumlah baris yang disalin; menjalankan ulang tidak menggandakan baris.
+    """
+    last_rowid = _load_watermark(root)
+    conn = sqlite3.connect(db_path)
+    try:
+        df = pd.read_sql_query(
+            f"SELECT rowid, {', '.join(PRICE_COLUMNS)} FROM crypto_prices WHERE rowid > ? ORDER BY rowid",
+            conn, params=(last_rowid,)
+        )
+    finally:
+        conn.close()
+    if not df.empty:
+        write_rows(root, df.drop(columns='rowid'))
+        state_path = os.path.join(root, STATE_FILE)
+        with open(state_path + '.tmp', 'w') as f:
+            json.dump({'last_rowid': int(df['rowid'].iloc[-1])}, f)
+        os.replace(state_path + '.tmp', state_path)
+    return len(df)
+
+def store_size(root):
+    return sum(os.path.getsize(path) for path in glob.glob(os.path.join(root, '*')))
+
+
+if __name__ == "__main__":
+    # Pemakaian: python compact_store.py <crypto_data.db> <folder_output>
+    db_path, root = sys.argv[1], sys.argv[2]
+    print(f"Mengekspor {db_path} ke store ringkas {root}...")
+    rows = export_db(db_path, root)
+    ratio = os.path.getsize(db_path) / max(store_size(root), 1)
+    print(f"{rows} baris diekspor. Ukuran: {store_size(root):,} byte ({ratio:.1f}x lebih kecil dari database).")
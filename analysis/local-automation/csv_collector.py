@@ -1,11 +1,23 @@
 import os
+import sys
 import sqlite3
-import requests
+import time
 import pandas as pd
 import json
 from dotenv import load_dotenv
 from datetime import datetime
 
+# Menambahkan folder cleaning dan analysis/scripts ke sys.path agar modul bersama bisa dipakai ulang
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'cleaning'))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+from data_cleaner_and_puller import clean_and_format_data, fetch_data
+from alerts import AnomalyDetector, write_alerts
+from correlation import OnlineCorrelation
+from metrics import stage
+from snapshot_dedupe import SnapshotDeduper
+from rollups import init_rollup_schema, prune_raw, roll_up
+from snapshot_index import init_snapshot_index_schema, update_snapshot_index
+
 # --- 1. Konfigurasi ---
 # Panggil load_dotenv() untuk memuat environment variables dari file .env
 load_dotenv()
@@ -13,53 +25,71 @@ load_dotenv()
 DB_PATH = "B:/GitHub Repository/Automated-Crypto-Market-Insights/analysis/database/crypto_data.db"
 CLEANED_CSV_FILE = "B:/GitHub Repository/Automated-Crypto-Market-Insights/analysis/cleaned-data/cleaned_data.csv"
 API_KEY = os.getenv("CMC_API_KEY")
-API_URL = "https://pro-api.coinmarketcap.com/v1/cryptocurrency/listings/latest"
+# State korelasi antar koin, disimpan di samping database agar tidak perlu replay history
+CORRELATION_STATE = os.path.join(os.path.dirname(DB_PATH), 'correlation_state.npz')
+# Fingerprint data terakhir per koin yang sudah masuk database (untuk membuang snapshot duplikat)
+DEDUPE_STATE = os.path.join(os.path.dirname(DB_PATH), 'snapshot_state.json')
+# Statistik EWMA per koin untuk deteksi anomali (alert ditulis ke file alert default yang dibaca dashboard)
+ALERT_STATE = os.path.join(os.path.dirname(DB_PATH), 'alert_state.json')
+# Snapshot mentah yang lebih tua dari sekian hari dihapus setelah diringkas ke bar per jam/hari
+# (None = simpan selamanya)
+RAW_RETENTION_DAYS = None
 
 # --- 2. Fungsi untuk Menarik Data Mentah dari API ---
-def fetch_raw_data(api_key):
+def fetch_raw_data(api_key, limit=100):
     """
-    Menarik 100 data koin terbaru dari API.
+    Menarik `limit` data koin terbaru dari API (default 100).
+    Rentang di atas satu halaman diambil paralel per halaman oleh fetch_data.
     Mengembalikan data JSON jika berhasil, None jika gagal.
     """
     print("Memulai penarikan data dari CoinMarketCap API...")
-    headers = {
-        'Accepts': 'application/json',
-        'X-CMC_PRO_API_KEY': api_key,
-    }
-    parameters = {
-        'start': '1',
-        'limit': '100',
-        'convert': 'USD'
-    }
     
     if not api_key:
         print("Error: API Key tidak ditemukan. Pastikan file .env sudah diatur dengan benar.")
         return None
 
-    try:
-        response = requests.get(API_URL, headers=headers, params=parameters, timeout=10)
-        response.raise_for_status()
-        raw_data = response.json()
-        print("Data berhasil ditarik.")
-        return raw_data
-    except requests.exceptions.RequestException as e:
-        print(f"Error saat memanggil API: {e}")
+    raw_data = fetch_data(limit=limit, api_key=api_key)
+    if raw_data is None:
+        print("Error saat memanggil API.")
         return None
 
+    print(f"Data berhasil ditarik. Jumlah koin: {len(raw_data['data'])}")
+    return raw_data
+
 # --- 3. Fungsi untuk Memproses dan Menambahkan Data ke Database ---
-def process_and_append_to_db(raw_data, db_path):
+# Pragma SQLite default untuk ingest (bisa diganti lewat parameter `pragmas`)
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+}
+
+INSERT_PRICES_SQL = """
+    INSERT INTO crypto_prices (id, name, symbol, slug, cmc_rank, price, volume_24h, market_cap, 
+    percent_change_1h, percent_change_24h, percent_change_7d, last_updated, timestamp)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Database yang skemanya sudah dipastikan ada selama proses ini berjalan
+_initialized_dbs = set()
+
+PRICE_COLUMNS = """
+    id, name, symbol, slug, cmc_rank, price, volume_24h, market_cap,
+    percent_change_1h, percent_change_24h, percent_change_7d, last_updated, timestamp
+"""
+
+def init_schema(conn):
     """
-    Memproses data mentah yang berhasil ditarik dan menyimpannya ke database dengan skema baru.
+    Membuat tabel crypto_prices (history), index (id, timestamp), dan tabel latest_prices
+    (satu baris terbaru per koin) jika belum ada. latest_prices di-upsert oleh trigger
+    setiap kali baris masuk ke crypto_prices, sehingga selalu sinkron di semua jalur ingest.
     """
-    if not raw_data or 'data' not in raw_data:
-        print("Tidak ada data valid untuk diproses dan disimpan ke database.")
-        return
-
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+    has_latest = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'latest_prices'"
+    ).fetchone()
 
-    # Membuat tabel crypto_prices jika belum ada, sesuai dengan skema baru
-    cursor.execute('''
+    conn.executescript(f'''
+        BEGIN;
+        -- Membuat tabel crypto_prices jika belum ada, sesuai dengan skema baru
         CREATE TABLE IF NOT EXISTS crypto_prices (
             id INTEGER,
             name TEXT,
@@ -74,70 +104,275 @@ def process_and_append_to_db(raw_data, db_path):
             percent_change_7d REAL,
             last_updated TEXT,
             timestamp TEXT
-        )
+        );
+        CREATE INDEX IF NOT EXISTS idx_crypto_prices_id_timestamp
+            ON crypto_prices (id, timestamp);
+
+        CREATE TABLE IF NOT EXISTS latest_prices (
+            id INTEGER PRIMARY KEY,
+            name TEXT,
+            symbol TEXT,
+            slug TEXT,
+            cmc_rank INTEGER,
+            price REAL,
+            volume_24h REAL,
+            market_cap REAL,
+            percent_change_1h REAL,
+            percent_change_24h REAL,
+            percent_change_7d REAL,
+            last_updated TEXT,
+            timestamp TEXT
+        );
+        CREATE TRIGGER IF NOT EXISTS trg_crypto_prices_latest
+        AFTER INSERT ON crypto_prices
+        BEGIN
+            INSERT INTO latest_prices ({PRICE_COLUMNS})
+            VALUES (NEW.id, NEW.name, NEW.symbol, NEW.slug, NEW.cmc_rank, NEW.price,
+                    NEW.volume_24h, NEW.market_cap, NEW.percent_change_1h,
+                    NEW.percent_change_24h, NEW.percent_change_7d, NEW.last_updated, NEW.timestamp)
+            ON CONFLICT(id) DO UPDATE SET
+                name = excluded.name, symbol = excluded.symbol, slug = excluded.slug,
+                cmc_rank = excluded.cmc_rank, price = excluded.price,
+                volume_24h = excluded.volume_24h, market_cap = excluded.market_cap,
+                percent_change_1h = excluded.percent_change_1h,
+                percent_change_24h = excluded.percent_change_24h,
+                percent_change_7d = excluded.percent_change_7d,
+                last_updated = excluded.last_updated, timestamp = excluded.timestamp
+            WHERE excluded.timestamp >= latest_prices.timestamp;
+        END;
+        COMMIT;
     ''')
 
-    # Memproses setiap koin dan menyisipkan ke tabel
+    # Database lama: isi latest_prices sekali dari history yang sudah ada
+    if not has_latest:
+        conn.execute(f"""
+            INSERT OR REPLACE INTO latest_prices ({PRICE_COLUMNS})
+            SELECT {PRICE_COLUMNS} FROM crypto_prices ORDER BY timestamp
+        """)
+
+    init_rollup_schema(conn)
+    init_snapshot_index_schema(conn)
+
+def connect_db(db_path, pragmas=None):
+    """
+    Membuka koneksi SQLite dalam mode autocommit (transaksi dikelola secara eksplisit),
+    menerapkan pragma, dan memastikan skema ada (sekali per database).
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    for name, value in (DEFAULT_PRAGMAS if pragmas is None else pragmas).items():
+        conn.execute(f"PRAGMA {name}={value}")
+
+    if db_path not in _initialized_dbs:
+        init_schema(conn)
+        _initialized_dbs.add(db_path)
+    return conn
+
+def build_price_rows(raw_data, timestamp_fetched):
+    """
+    Mengubah payload API menjadi list tuple baris crypto_prices.
+    Semua baris dari satu snapshot memakai timestamp_fetched yang sama.
+    """
+    rows = []
     for coin in raw_data['data']:
         try:
-            # Mengambil data tingkat atas
-            coin_id = coin.get('id')
-            name = coin.get('name')
-            symbol = coin.get('symbol')
-            slug = coin.get('slug')
-            cmc_rank = coin.get('cmc_rank')
-            last_updated_cmc = coin.get('last_updated')
-
             # Mengambil data dari objek quote.USD
             quote_usd = coin.get('quote', {}).get('USD', {})
-            price = quote_usd.get('price')
-            volume_24h = quote_usd.get('volume_24h')
-            market_cap = quote_usd.get('market_cap')
-            percent_change_1h = quote_usd.get('percent_change_1h')
-            percent_change_24h = quote_usd.get('percent_change_24h')
-            percent_change_7d = quote_usd.get('percent_change_7d')
-
-            # Timestamp saat data diambil oleh skrip ini
-            timestamp_fetched = datetime.now().isoformat()
-            
-            # Memasukkan data yang sudah diproses ke tabel crypto_prices
-            cursor.execute("""
-                INSERT INTO crypto_prices (id, name, symbol, slug, cmc_rank, price, volume_24h, market_cap, 
-                percent_change_1h, percent_change_24h, percent_change_7d, last_updated, timestamp)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (coin_id, name, symbol, slug, cmc_rank, price, volume_24h, market_cap, 
-                  percent_change_1h, percent_change_24h, percent_change_7d, last_updated_cmc, timestamp_fetched))
+            rows.append((
+                coin.get('id'), coin.get('name'), coin.get('symbol'), coin.get('slug'),
+                coin.get('cmc_rank'),
+                quote_usd.get('price'), quote_usd.get('volume_24h'), quote_usd.get('market_cap'),
+                quote_usd.get('percent_change_1h'), quote_usd.get('percent_change_24h'),
+                quote_usd.get('percent_change_7d'),
+                coin.get('last_updated'), timestamp_fetched
+            ))
         except Exception as e:
             print(f"Peringatan: Gagal memproses data untuk koin {coin.get('name', 'N/A')}. Error: {e}")
             continue
+    return rows
 
-    conn.commit()
-    conn.close()
-    print(f"100 data baru berhasil ditambahkan ke database: {db_path}")
+def bulk_insert_rows(conn, rows):
+    """
+    Menulis baris (list atau iterator tuple) ke crypto_prices dengan satu executemany
+    di dalam satu transaksi eksplisit. Iterator tidak dimuat ke memori sekaligus,
+    sehingga cocok juga untuk impor jutaan baris. Mengembalikan jumlah baris yang ditulis.
+    """
+    conn.execute("BEGIN")
+    try:
+        cursor = conn.executemany(INSERT_PRICES_SQL, rows)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return cursor.rowcount
 
-# --- 4. Fungsi untuk Menyimpan Data dari Database ke CSV ---
-def db_to_csv(db_path, csv_file):
+def process_and_append_to_db(raw_data, db_path, pragmas=None):
     """
-    Membaca seluruh data dari tabel crypto_prices dan menyimpannya ke file CSV.
+    Memproses data mentah yang berhasil ditarik dan menyimpannya ke database dengan skema baru.
+    `pragmas` berupa dict pragma SQLite (default DEFAULT_PRAGMAS, misalnya WAL dan synchronous=NORMAL).
+    Mengembalikan jumlah baris yang ditambahkan.
     """
-    print("Menyimpan data dari database ke CSV...")
-    conn = sqlite3.connect(db_path)
+    if not raw_data or 'data' not in raw_data:
+        print("Tidak ada data valid untuk diproses dan disimpan ke database.")
+        return 0
+
+    # Timestamp saat data diambil oleh skrip ini, sama untuk seluruh snapshot
+    timestamp_fetched = datetime.now().isoformat()
+    rows = build_price_rows(raw_data, timestamp_fetched)
+
+    conn = connect_db(db_path, pragmas)
     try:
-        # Membaca seluruh data dari tabel ke dalam DataFrame
-        df = pd.read_sql_query("SELECT * FROM crypto_prices", conn)
-    except pd.io.sql.DatabaseError:
-        print(f"Peringatan: Tabel 'crypto_prices' tidak ditemukan. Tidak ada data yang diproses ke CSV.")
-        return
+        with stage('process_and_append_to_db') as record:
+            start_time = time.perf_counter()
+            inserted = record['rows'] = bulk_insert_rows(conn, rows)
+            elapsed = time.perf_counter() - start_time
     finally:
         conn.close()
 
-    if df.empty:
-        print("Database kosong, tidak ada data untuk disimpan.")
+    rows_per_second = inserted / elapsed if elapsed > 0 else float('inf')
+    print(f"{inserted} data baru berhasil ditambahkan ke database: {db_path} "
+          f"({rows_per_second:,.0f} baris/detik)")
+    return inserted
+
+# --- 4. Fungsi untuk Menyimpan Data dari Database ke CSV ---
+def watermark_path(csv_file):
+    """Lokasi file watermark untuk sebuah CSV ekspor."""
+    return csv_file + '.watermark.json'
+
+def load_watermark(csv_file):
+    """
+    Membaca watermark ekspor (rowid terakhir yang sudah ditulis ke CSV).
+    Mengembalikan None jika watermark tidak ada, rusak, atau tidak cocok lagi dengan file CSV.
+    """
+    try:
+        with open(watermark_path(csv_file)) as f:
+            watermark = json.load(f)
+        last_rowid = int(watermark['last_rowid'])
+        csv_size = int(watermark['csv_size'])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+    # CSV yang hilang atau diubah di luar ekspor ini tidak bisa dilanjutkan secara inkremental
+    if not os.path.exists(csv_file) or os.path.getsize(csv_file) != csv_size:
+        return None
+    return last_rowid
+
+def save_watermark(csv_file, last_rowid):
+    """Menyimpan rowid terakhir beserta ukuran CSV saat ini."""
+    watermark = {
+        'last_rowid': int(last_rowid),
+        'csv_size': os.path.getsize(csv_file),
+        'exported_at': datetime.now().isoformat(),
+    }
+    with open(watermark_path(csv_file), 'w') as f:
+        json.dump(watermark, f)
+
+def db_to_csv(db_path, csv_file, incremental=True):
+    """
+    Menyimpan data dari tabel crypto_prices ke file CSV.
+    Mode inkremental hanya membaca baris dengan rowid di atas watermark dan menambahkannya
+    ke CSV; ekspor penuh dilakukan jika incremental=False atau watermark tidak valid.
+    """
+    with stage('db_to_csv', incremental=incremental) as record:
+        print("Menyimpan data dari database ke CSV...")
+        last_rowid = load_watermark(csv_file) if incremental else None
+
+        conn = sqlite3.connect(db_path)
+        try:
+            # Watermark di atas rowid maksimum berarti database sudah diganti, jadi ekspor ulang penuh
+            max_rowid = conn.execute("SELECT MAX(rowid) FROM crypto_prices").fetchone()[0] or 0
+            if last_rowid is not None and last_rowid > max_rowid:
+                print("Peringatan: Watermark tidak cocok dengan database, melakukan ekspor penuh.")
+                last_rowid = None
+
+            # Membaca hanya data baru (atau seluruh data untuk ekspor penuh) ke dalam DataFrame
+            df = pd.read_sql_query(
+                "SELECT rowid AS _rowid, * FROM crypto_prices WHERE rowid > ? ORDER BY rowid",
+                conn, params=(last_rowid or 0,)
+            )
+        except (sqlite3.DatabaseError, pd.io.sql.DatabaseError):
+            print(f"Peringatan: Tabel 'crypto_prices' tidak ditemukan. Tidak ada data yang diproses ke CSV.")
+            return
+        finally:
+            conn.close()
+        record['rows'] = len(df)
+        record['full_export'] = last_rowid is None
+
+        if last_rowid is not None:
+            if df.empty:
+                print("Tidak ada data baru sejak ekspor terakhir.")
+                return
+            # Menambahkan data baru ke akhir CSV
+            size_before = os.path.getsize(csv_file)
+            df.drop(columns='_rowid').to_csv(csv_file, mode='a', header=False, index=False)
+            record['bytes'] = os.path.getsize(csv_file) - size_before
+            save_watermark(csv_file, df['_rowid'].iloc[-1])
+            print(f"{len(df)} baris baru berhasil ditambahkan ke {csv_file}")
+            return
+
+        if df.empty:
+            print("Database kosong, tidak ada data untuk disimpan.")
+            return
+
+        # Menyimpan DataFrame ke CSV
+        df.drop(columns='_rowid').to_csv(csv_file, mode='w', header=True, index=False)
+        record['bytes'] = os.path.getsize(csv_file)
+        save_watermark(csv_file, df['_rowid'].iloc[-1])
+        print(f"Seluruh data dari database berhasil disimpan ke {csv_file}")
+
+# --- 4b. Fungsi untuk Memperbarui Korelasi Antar Koin ---
+def update_correlation(raw_data, state_path=CORRELATION_STATE):
+    """
+    Memasukkan snapshot baru ke matriks korelasi inkremental (O(koin^2) per snapshot)
+    lalu menyimpan state-nya. Snapshot yang sudah pernah diproses dilewati.
+    """
+    if not raw_data or 'data' not in raw_data:
         return
 
-    # Menyimpan DataFrame ke CSV
-    df.to_csv(csv_file, mode='w', header=True, index=False)
-    print(f"Seluruh data dari database berhasil disimpan ke {csv_file}")
+    columns = clean_and_format_data(raw_data, as_frame=False)
+    tracker = OnlineCorrelation.load(state_path)
+    if tracker.update(columns['id'], columns['price'], columns['pull_timestamp'][0]):
+        tracker.save(state_path)
+        print(f"Matriks korelasi diperbarui ({len(tracker.coin_ids)} koin).")
+
+def update_alerts(raw_data, state_path=ALERT_STATE):
+    """
+    Memeriksa snapshot baru terhadap statistik EWMA per koin (O(1) per koin, tanpa membaca
+    history), lalu menyimpan alert dan state-nya. Snapshot yang sudah pernah diproses dilewati.
+    """
+    if not raw_data or 'data' not in raw_data:
+        return
+
+    detector = AnomalyDetector(state_path)
+    alerts = detector.update(clean_and_format_data(raw_data, as_frame=False))
+    write_alerts(alerts)
+    detector.commit()
+    if alerts:
+        print(f"{len(alerts)} alert anomali baru ditulis.")
+
+def update_rollups(db_path, raw_retention_days=RAW_RETENTION_DAYS):
+    """
+    Meringkas snapshot baru ke bar per jam dan per hari, lalu memangkas data mentah lama
+    jika `raw_retention_days` diisi.
+    """
+    conn = connect_db(db_path)
+    try:
+        rolled = roll_up(conn)
+        pruned = prune_raw(conn, raw_retention_days) if raw_retention_days else 0
+    finally:
+        conn.close()
+    print(f"{rolled} baris diringkas ke bar per jam/hari, {pruned} baris mentah lama dihapus.")
+
+def update_time_index(db_path):
+    """
+    Menambahkan snapshot baru ke index snapshot (timestamp -> rentang rowid, plus keyframe),
+    yang dipakai query "pasar pada waktu T" (snapshot_index.market_as_of).
+    """
+    conn = connect_db(db_path)
+    try:
+        indexed = update_snapshot_index(conn)
+    finally:
+        conn.close()
+    print(f"{indexed} baris baru dimasukkan ke index snapshot.")
 
 # --- 5. Fungsi Utama untuk Menjalankan Semua Langkah ---
 def main():
@@ -160,7 +395,18 @@ def main():
     
     # Jika pengambilan data berhasil, proses dan simpan ke database
     if raw_data:
-        process_and_append_to_db(raw_data, DB_PATH)
+        # Hanya koin yang berubah sejak snapshot terakhir yang ditambahkan ke database
+        deduper = SnapshotDeduper(DEDUPE_STATE)
+        changed_data = deduper.filter_changed(raw_data)
+        if changed_data['data']:
+            process_and_append_to_db(changed_data, DB_PATH)
+            deduper.commit()
+            update_correlation(raw_data)
+            update_alerts(raw_data)
+            update_rollups(DB_PATH)
+            update_time_index(DB_PATH)
+        else:
+            print("Tidak ada data yang berubah sejak snapshot terakhir. Penyimpanan ke database dilewati.")
     
     # Simpan seluruh data dari DB ke CSV
     db_to_csv(DB_PATH, CLEANED_CSV_FILE)
@@ -0,0 +1,102 @@
+import pandas as pd
+
+from csv_collector import DB_PATH, PRICE_COLUMNS, connect_db
+from rollups import TIER_SECONDS, TIERS, choose_tier
+
+# --- Query Harga dari Database ---
+# Semua query memakai tabel latest_prices atau index (id, timestamp) di crypto_prices,
+# sehingga tidak perlu memindai seluruh history.
+
+def _read(sql, params=(), db_path=DB_PATH):
+    conn = connect_db(db_path)
+    try:
+        return pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
+
+def latest(db_path=DB_PATH):
+    """
+    Data terbaru untuk setiap koin, diurutkan berdasarkan cmc_rank.
+    Biayanya sebanding dengan jumlah koin, bukan panjang history.
+    """
+    return _read(
+        f"SELECT {PRICE_COLUMNS} FROM latest_prices ORDER BY cmc_rank",
+        db_path=db_path
+    )
+
+def history(coin_id, start=None, end=None, db_path=DB_PATH):
+    """
+    History satu koin dalam rentang timestamp [start, end] (keduanya opsional),
+    dibaca melalui index (id, timestamp).
+    """
+    sql = f"SELECT {PRICE_COLUMNS} FROM crypto_prices WHERE id = ?"
+    params = [_as_id(coin_id)]
+    if start is not None:
+        sql += " AND timestamp >= ?"
+        params.append(_as_text(start))
+    if end is not None:
+        sql += " AND timestamp <= ?"
+        params.append(_as_text(end))
+    return _read(sql + " ORDER BY timestamp", params, db_path)
+
+def as_of(ts, db_path=DB_PATH):
+    """
+    Kondisi pasar pada waktu `ts`: baris terakhir setiap koin dengan timestamp <= ts.
+    Untuk setiap koin hanya dilakukan satu pencarian di index (id, timestamp).
+    """
+    return _read(f"""
+        SELECT {PRICE_COLUMNS} FROM crypto_prices
+        WHERE rowid IN (
+            SELECT (
+                SELECT rowid FROM crypto_prices AS c
+                WHERE c.id = coins.id AND c.timestamp <= ?
+                ORDER BY c.timestamp DESC LIMIT 1
+            )
+            FROM latest_prices AS coins
+        )
+        ORDER BY cmc_rank
+    """, (_as_text(ts),), db_path)
+
+def bars(coin_id, start=None, end=None, resolution=None, max_points=None, db_path=DB_PATH):
+    """
+    Harga satu koin sebagai bar OHLC (timestamp, open, high, low, close, volume_24h,
+    market_cap, cmc_rank), dari tier paling kasar yang memenuhi `resolution`
+    (misalnya '1h' atau '1d') atau `max_points` titik untuk rentang [start, end].
+    Rentang panjang dengan resolusi kasar hanya membaca ribuan bar, bukan jutaan snapshot.
+    """
+    if max_points and (start is None or end is None):
+        raise ValueError("max_points membutuhkan start dan end.")
+    oldest_raw = _read(
+        "SELECT MIN(timestamp) AS oldest FROM crypto_prices WHERE id = ?", (_as_id(coin_id),), db_path
+    )['oldest'].iloc[0]
+    tier = choose_tier(start, end, resolution, max_points, oldest_raw)
+
+    if tier == 'raw':
+        df = history(coin_id, start, end, db_path)
+        return pd.DataFrame({
+            'timestamp': df['timestamp'],
+            'open': df['price'], 'high': df['price'], 'low': df['price'], 'close': df['price'],
+            'volume_24h': df['volume_24h'], 'market_cap': df['market_cap'], 'cmc_rank': df['cmc_rank'],
+        })
+
+    sql = f"""
+        SELECT bucket AS timestamp, open, high, low, close, volume_24h, market_cap, cmc_rank
+        FROM {TIERS[tier][0]} WHERE id = ?
+    """
+    params = [_as_id(coin_id)]
+    if start is not None:
+        sql += " AND bucket >= ?"
+        params.append(_as_text(pd.Timestamp(start).floor(pd.Timedelta(seconds=TIER_SECONDS[tier]))))
+    if end is not None:
+        sql += " AND bucket <= ?"
+        params.append(_as_text(end))
+    return _read(sql + " ORDER BY bucket", params, db_path)
+
+def _as_id(value):
+    # sqlite3 mengikat numpy.int64 (misalnya df['id'].iloc[0]) sebagai BLOB, sehingga tanpa
+    # konversi ke int query diam-diam tidak menemukan baris apa pun
+    return int(value)
+
+def _as_text(value):
+    # Kolom timestamp disimpan sebagai teks ISO (datetime.isoformat), jadi pembandingnya juga teks
+    return pd.Timestamp(value).isoformat() if not isinstance(value, str) else value
@@ -0,0 +1,203 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+# --- Rollup Bertingkat (OHLC per Jam dan per Hari) ---
+# Snapshot mentah di crypto_prices diringkas secara inkremental menjadi bar per koin:
+# open/high/low/close harga, rata-rata volume_24h dan market_cap, serta cmc_rank terakhir.
+# Hanya baris dengan rowid di atas watermark yang dibaca setiap kali rollup dijalankan,
+# lalu digabung (merge) ke bar yang sudah ada, sehingga bar tetap benar walaupun
+# data mentahnya kemudian dipangkas oleh prune_raw.
+
+# Nama tabel bar dan panjang prefix timestamp ISO yang menentukan bucket-nya
+TIERS = {
+    '1h': ('price_bars_1h', 13, ':00:00'),   # 2025-08-09T17 -> 2025-08-09T17:00:00
+    '1d': ('price_bars_1d', 10, 'T00:00:00'),  # 2025-08-09 -> 2025-08-09T00:00:00
+}
+TIER_SECONDS = {'raw': 0, '1h': 3600, '1d': 86400}
+
+BAR_COLUMNS = [
+    'id', 'bucket', 'open', 'high', 'low', 'close', 'volume_24h', 'market_cap',
+    'cmc_rank', 'samples', 'first_timestamp', 'last_timestamp'
+]
+
+
+def init_rollup_schema(conn):
+    """Membuat tabel bar per tier dan tabel watermark rollup jika belum ada."""
+    statements = ["""
+        CREATE TABLE IF NOT EXISTS rollup_state (
+            name TEXT PRIMARY KEY,
+            last_rowid INTEGER
+        );
+    """]
+    for table, _, _ in TIERS.values():
+        statements.append(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                id INTEGER,
+                bucket TEXT,
+                open REAL,
+                high REAL,
+                low REAL,
+                close REAL,
+                volume_24h REAL,
+                market_cap REAL,
+                cmc_rank INTEGER,
+                samples INTEGER,
+                first_timestamp TEXT,
+                last_timestamp TEXT,
+                PRIMARY KEY (id, bucket)
+            );
+        """)
+    conn.executescript("BEGIN;" + "".join(statements) + "COMMIT;")
+
+
+def _merge_sql(table):
+    # Menggabungkan bar parsial (excluded) dengan bar yang sudah ada pada (id, bucket) yang sama.
+    # Di SQLite semua ekspresi SET membaca nilai baris lama, jadi urutan assignment tidak berpengaruh.
+    return f"""
+        INSERT INTO {table} ({', '.join(BAR_COLUMNS)})
+        VALUES ({', '.join('?' for _ in BAR_COLUMNS)})
+        ON CONFLICT(id, bucket) DO UPDATE SET
+            open = CASE WHEN excluded.first_timestamp < first_timestamp THEN excluded.open ELSE open END,
+            high = MAX(COALESCE(high, excluded.high), COALESCE(excluded.high, high)),
+            low = MIN(COALESCE(low, excluded.low), COALESCE(excluded.low, low)),
+            close = CASE WHEN excluded.last_timestamp >= last_timestamp THEN excluded.close ELSE close END,
+            cmc_rank = CASE WHEN excluded.last_timestamp >= last_timestamp THEN excluded.cmc_rank ELSE cmc_rank END,
+            volume_24h = COALESCE(
+                (volume_24h * samples + excluded.volume_24h * excluded.samples) / (samples + excluded.samples),
+                volume_24h, excluded.volume_24h),
+            market_cap = COALESCE(
+                (market_cap * samples + excluded.market_cap * excluded.samples) / (samples + excluded.samples),
+                market_cap, excluded.market_cap),
+            samples = samples + excluded.samples,
+            first_timestamp = MIN(first_timestamp, excluded.first_timestamp),
+            last_timestamp = MAX(last_timestamp, excluded.last_timestamp)
+    """
+
+
+def aggregate_bars(df, tier):
+    """Meringkas baris mentah (id, timestamp, price, volume_24h, market_cap, cmc_rank) menjadi bar."""
+    _, prefix, suffix = TIERS[tier]
+    df = df.sort_values(['id', 'timestamp'])
+    grouped = df.groupby(['id', df['timestamp'].str[:prefix] + suffix], sort=False)
+    bars = grouped.agg(
+        open=('price', 'first'),
+        high=('price', 'max'),
+        low=('price', 'min'),
+        close=('price', 'last'),
+        volume_24h=('volume_24h', 'mean'),
+        market_cap=('market_cap', 'mean'),
+        cmc_rank=('cmc_rank', 'last'),
+        samples=('price', 'size'),
+        first_timestamp=('timestamp', 'first'),
+        last_timestamp=('timestamp', 'last'),
+    )
+    bars.index.names = ['id', 'bucket']
+    return bars.reset_index()[BAR_COLUMNS]
+
+
+def _rows(bars):
+    # NaN (misalnya volume kosong) ditulis sebagai NULL, dan tipe numpy diubah ke tipe Python
+    return bars.astype(object).where(bars.notna(), None).itertuples(index=False, name=None)
+
+
+def roll_up(conn, batch_size=100_000):
+    """
+    Menggabungkan snapshot mentah yang belum diringkas ke semua tier dalam satu transaksi.
+    Dibaca per batch rowid agar impor besar tidak dimuat ke memori sekaligus.
+    Mengembalikan jumlah baris mentah yang diproses.
+    """
+    row = conn.execute("SELECT last_rowid FROM rollup_state WHERE name = 'raw'").fetchone()
+    last_rowid = row[0] if row else 0
+    processed = 0
+
+    while True:
+        df = pd.read_sql_query(
+            """
+            SELECT rowid, id, timestamp, price, volume_24h, market_cap, cmc_rank
+            FROM crypto_prices WHERE rowid > ? ORDER BY rowid LIMIT ?
+            """,
+            conn, params=(last_rowid, batch_size)
+        )
+        if df.empty:
+            break
+
+        conn.execute("BEGIN")
+        try:
+            for tier, (table, _, _) in TIERS.items():
+                conn.executemany(_merge_sql(table), _rows(aggregate_bars(df, tier)))
+            last_rowid = int(df['rowid'].iloc[-1])
+            conn.execute(
+                "INSERT OR REPLACE INTO rollup_state (name, last_rowid) VALUES ('raw', ?)", (last_rowid,)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        processed += len(df)
+
+    return processed
+
+
+def prune_raw(conn, keep_days, now=None):
+    """
+    Menghapus snapshot mentah yang lebih tua dari `keep_days` hari dan sudah diringkas.
+    Baris dengan rowid terbesar tidak pernah dihapus, agar SQLite tidak memakai ulang rowid
+    yang menjadi watermark rollup dan ekspor CSV. Mengembalikan jumlah baris yang dihapus.
+    """
+    cutoff = ((now or datetime.now()) - timedelta(days=keep_days)).isoformat()
+    row = conn.execute("SELECT last_rowid FROM rollup_state WHERE name = 'raw'").fetchone()
+    if not row:
+        return 0
+
+    conn.execute("BEGIN")
+    try:
+        cursor = conn.execute(
+            """
+            DELETE FROM crypto_prices
+            WHERE timestamp < ? AND rowid <= ?
+              AND rowid < (SELECT MAX(rowid) FROM crypto_prices)
+            """,
+            (cutoff, row[0])
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return cursor.rowcount
+
+
+def prune_bars(conn, tier, keep_days, now=None):
+    """Menghapus bar tier `tier` yang lebih tua dari `keep_days` hari. Mengembalikan jumlah baris."""
+    table = TIERS[tier][0]
+    cutoff = ((now or datetime.now()) - timedelta(days=keep_days)).isoformat()
+    conn.execute("BEGIN")
+    try:
+        cursor = conn.execute(f"DELETE FROM {table} WHERE bucket < ?", (cutoff,))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return cursor.rowcount
+
+
+def choose_tier(start, end, resolution=None, max_points=None, oldest_raw=None):
+    """
+    Memilih tier paling kasar yang masih memenuhi resolusi yang diminta.
+    `resolution` berupa string/Timedelta (misalnya '1h'); tanpa resolusi, dipakai
+    (end - start) / max_points. Jika data mentah untuk `start` sudah dipangkas,
+    tier mentah tidak dipilih.
+    """
+    if resolution is not None:
+        seconds = pd.Timedelta(resolution).total_seconds()
+    elif max_points:
+        seconds = (pd.Timestamp(end) - pd.Timestamp(start)).total_seconds() / max_points
+    else:
+        seconds = 0
+
+    for tier in ('1d', '1h'):
+        if TIER_SECONDS[tier] <= seconds:
+            return tier
+    if oldest_raw is not None and start is not None and pd.Timestamp(start) < pd.Timestamp(oldest_raw):
+        return '1h'
+    return 'raw'
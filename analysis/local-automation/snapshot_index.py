@@ -0,0 +1,231 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+# --- Index Snapshot untuk Query "Pasar pada Waktu T" ---
+# Setiap snapshot yang ditulis process_and_append_to_db menempati rentang rowid yang berurutan
+# di crypto_prices (satu executemany, timestamp sama). snapshot_index menyimpan rentang itu per
+# timestamp, sehingga snapshot mana pun ditemukan dengan binary search lalu dibaca sebagai satu
+# rentang rowid, tanpa memfilter seluruh history.
+# Karena koin yang tidak berubah tidak ditulis ulang (SnapshotDeduper), satu snapshot belum tentu
+# berisi semua koin. Karena itu setiap KEYFRAME_ROWS baris disimpan keyframe: rowid baris terakhir
+# setiap koin pada saat itu. Pasar pada waktu T = keyframe terakhir sebelum T + baris sesudahnya
+# sampai snapshot T (satu rentang rowid, maksimal sekitar KEYFRAME_ROWS baris).
+# Asumsi: snapshot ditulis berurutan waktu (rowid naik seiring timestamp), seperti di collector.
+
+# Jumlah baris mentah di antara dua keyframe (batas atas baris delta yang dibaca per query)
+KEYFRAME_ROWS = 20_000
+SNAPSHOT_COLUMNS = """
+    id, name, symbol, slug, cmc_rank, price, volume_24h, market_cap,
+    percent_change_1h, percent_change_24h, percent_change_7d, last_updated, timestamp
+"""
+
+
+def init_snapshot_index_schema(conn):
+    """Membuat tabel snapshot_index, snapshot_keyframes, dan tabel watermark jika belum ada."""
+    conn.executescript("""
+        BEGIN;
+        CREATE TABLE IF NOT EXISTS rollup_state (
+            name TEXT PRIMARY KEY,
+            last_rowid INTEGER
+        );
+        CREATE TABLE IF NOT EXISTS snapshot_index (
+            timestamp TEXT PRIMARY KEY,
+            first_rowid INTEGER,
+            last_rowid INTEGER,
+            rows INTEGER
+        );
+        CREATE TABLE IF NOT EXISTS snapshot_keyframes (
+            timestamp TEXT PRIMARY KEY,
+            last_rowid INTEGER,
+            ids BLOB,
+            rowids BLOB
+        );
+        COMMIT;
+    """)
+
+
+def _load_keyframe_state(conn):
+    # Peta id -> rowid terakhir pada keyframe terbaru, beserta rowid keyframe tersebut
+    row = conn.execute(
+        "SELECT last_rowid, ids, rowids FROM snapshot_keyframes ORDER BY last_rowid DESC LIMIT 1"
+    ).fetchone()
+    if not row:
+        return {}, 0
+    ids = np.frombuffer(row[1], dtype=np.int64)
+    rowids = np.frombuffer(row[2], dtype=np.int64)
+    return dict(zip(ids.tolist(), rowids.tolist())), row[0]
+
+
+def update_snapshot_index(conn, batch_size=100_000):
+    """
+    Menambahkan snapshot baru (rowid di atas watermark) ke snapshot_index dan menulis keyframe
+    setiap KEYFRAME_ROWS baris. Mengembalikan jumlah baris mentah yang diproses.
+    """
+    row = conn.execute("SELECT last_rowid FROM rollup_state WHERE name = 'snapshot_index'").fetchone()
+    last_rowid = row[0] if row else 0
+
+    # State koin terkini = keyframe terakhir + baris sesudahnya sampai watermark
+    latest, keyframe_rowid = _load_keyframe_state(conn)
+    for coin_id, rowid in conn.execute(
+        "SELECT id, rowid FROM crypto_prices WHERE rowid > ? AND rowid <= ? ORDER BY rowid",
+        (keyframe_rowid, last_rowid)
+    ):
+        latest[coin_id] = rowid
+    rows_since_keyframe = last_rowid - keyframe_rowid
+
+    processed = 0
+    while True:
+        df = pd.read_sql_query(
+            "SELECT rowid, id, timestamp FROM crypto_prices WHERE rowid > ? ORDER BY rowid LIMIT ?",
+            conn, params=(last_rowid, batch_size)
+        )
+        if df.empty:
+            break
+
+        rowids = df['rowid'].to_numpy(dtype=np.int64)
+        timestamps = df['timestamp'].to_numpy(dtype=object)
+        # Awal setiap run timestamp yang sama (satu snapshot) di dalam batch
+        starts = np.flatnonzero(np.r_[True, timestamps[1:] != timestamps[:-1]])
+        ends = np.r_[starts[1:], len(df)]
+
+        conn.execute("BEGIN")
+        try:
+            for start, end in zip(starts, ends):
+                # Snapshot yang terpotong batch sebelumnya digabung ke entri yang sudah ada
+                conn.execute("""
+                    INSERT INTO snapshot_index (timestamp, first_rowid, last_rowid, rows)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(timestamp) DO UPDATE SET
+                        first_rowid = MIN(first_rowid, excluded.first_rowid),
+                        last_rowid = MAX(last_rowid, excluded.last_rowid),
+                        rows = rows + excluded.rows
+                """, (timestamps[start], int(rowids[start]), int(rowids[end - 1]), int(end - start)))
+
+                latest.update(zip(df['id'].iloc[start:end].tolist(), rowids[start:end].tolist()))
+                rows_since_keyframe += end - start
+                # Keyframe hanya di akhir snapshot yang sudah lengkap: snapshot terakhir batch bisa
+                # berlanjut di batch berikutnya, kecuali batch ini sudah mencapai akhir tabel
+                complete = end < len(df) or len(df) < batch_size
+                if rows_since_keyframe >= KEYFRAME_ROWS and complete:
+                    _write_keyframe(conn, timestamps[start], int(rowids[end - 1]), latest)
+                    rows_since_keyframe = 0
+
+            last_rowid = int(rowids[-1])
+            conn.execute(
+                "INSERT OR REPLACE INTO rollup_state (name, last_rowid) VALUES ('snapshot_index', ?)",
+                (last_rowid,)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        processed += len(df)
+
+    return processed
+
+
+def _write_keyframe(conn, timestamp, last_rowid, latest):
+    ids = np.fromiter(latest.keys(), dtype=np.int64, count=len(latest))
+    rowids = np.fromiter(latest.values(), dtype=np.int64, count=len(latest))
+    conn.execute(
+        "INSERT OR REPLACE INTO snapshot_keyframes (timestamp, last_rowid, ids, rowids) VALUES (?, ?, ?, ?)",
+        (timestamp, last_rowid, ids.tobytes(), rowids.tobytes())
+    )
+
+
+# Kelas index snapshot di memori untuk pencarian cepat (misalnya slider waktu di dashboard)
+class SnapshotIndex:
+    """
+    Array timestamp snapshot yang terurut beserta rentang rowid-nya, dan posisi keyframe.
+    Dimuat sekali (puluhan ribu baris untuk history berbulan-bulan), lalu setiap pencarian
+    "snapshot terakhir pada atau sebelum T" adalah satu np.searchsorted.
+    """
+
+    def __init__(self, timestamps, first_rowids, last_rowids, keyframe_rowids):
+        self.timestamps = timestamps
+        self.first_rowids = first_rowids
+        self.last_rowids = last_rowids
+        self.keyframe_rowids = keyframe_rowids
+
+    @classmethod
+    def empty(cls):
+        no_rows = np.empty(0, dtype=np.int64)
+        return cls(np.empty(0, dtype='datetime64[us]'), no_rows, no_rows, no_rows)
+
+    @classmethod
+    def load(cls, conn):
+        """Memuat index dari database; index kosong jika tabelnya belum ada (database lama)."""
+        has_index = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'snapshot_index'"
+        ).fetchone()
+        if not has_index:
+            return cls.empty()
+        index = pd.read_sql_query(
+            "SELECT timestamp, first_rowid, last_rowid FROM snapshot_index ORDER BY timestamp", conn
+        )
+        keyframes = conn.execute("SELECT last_rowid FROM snapshot_keyframes ORDER BY last_rowid").fetchall()
+        return cls(
+            pd.to_datetime(index['timestamp'], format='ISO8601').to_numpy(),
+            index['first_rowid'].to_numpy(dtype=np.int64),
+            index['last_rowid'].to_numpy(dtype=np.int64),
+            np.array([row[0] for row in keyframes], dtype=np.int64),
+        )
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    @property
+    def start(self):
+        return pd.Timestamp(self.timestamps[0]) if len(self) else None
+
+    @property
+    def end(self):
+        return pd.Timestamp(self.timestamps[-1]) if len(self) else None
+
+    def locate(self, ts):
+        """Posisi snapshot terakhir dengan timestamp <= ts, atau -1 jika ts sebelum snapshot pertama."""
+        return int(np.searchsorted(self.timestamps, np.datetime64(pd.Timestamp(ts)), side='right')) - 1
+
+    def snapshot_at(self, ts):
+        """Timestamp snapshot yang dipakai untuk waktu ts (atau None)."""
+        position = self.locate(ts)
+        return pd.Timestamp(self.timestamps[position]) if position >= 0 else None
+
+
+def market_as_of(conn, ts, index=None):
+    """
+    Kondisi pasar pada waktu `ts`: baris terakhir setiap koin sampai snapshot terakhir <= ts,
+    diurutkan berdasarkan cmc_rank. Peta id -> rowid diambil dari satu keyframe ditambah satu
+    rentang rowid sesudahnya (hanya kolom id dan rowid), lalu baris lengkap dibaca sekali per
+    koin; tidak ada filter atas seluruh history.
+    Koin yang baris mentahnya sudah dipangkas prune_raw tidak muncul lagi di waktu lampau itu.
+    """
+    index = SnapshotIndex.load(conn) if index is None else index
+    position = index.locate(ts)
+    if position < 0:
+        return pd.DataFrame(columns=[column.strip() for column in SNAPSHOT_COLUMNS.split(',')])
+    end_rowid = int(index.last_rowids[position])
+
+    # Keyframe terakhir yang tidak melewati snapshot yang dicari
+    keyframe = int(np.searchsorted(index.keyframe_rowids, end_rowid, side='right')) - 1
+    latest = {}
+    start_rowid = 0
+    if keyframe >= 0:
+        start_rowid = int(index.keyframe_rowids[keyframe])
+        ids, rowids = conn.execute(
+            "SELECT ids, rowids FROM snapshot_keyframes WHERE last_rowid = ?", (start_rowid,)
+        ).fetchone()
+        latest = dict(zip(np.frombuffer(ids, dtype=np.int64).tolist(),
+                          np.frombuffer(rowids, dtype=np.int64).tolist()))
+    latest.update(conn.execute(
+        "SELECT id, rowid FROM crypto_prices WHERE rowid > ? AND rowid <= ? ORDER BY rowid",
+        (start_rowid, end_rowid)
+    ))
+
+    return pd.read_sql_query(
+        f"SELECT {SNAPSHOT_COLUMNS} FROM crypto_prices "
+        "WHERE rowid IN (SELECT value FROM json_each(?)) ORDER BY cmc_rank",
+        conn, params=(json.dumps(list(latest.values())),)
+    )
@@ -0,0 +1,156 @@
+import numpy as np
+import pandas as pd
+
+# Per-coin label columns that are repeated on every history row
+LABEL_COLUMNS = ('name', 'symbol', 'slug')
+# Derived metrics that may be stored as float32 (prices, volumes and market caps stay float64,
+# since totals over thousands of coins need the extra precision)
+FLOAT32_COLUMNS = ('percent_change_1h', 'percent_change_24h', 'percent_change_7d')
+# Timestamp columns that are parsed to datetime64 when they were loaded as strings
+TIME_COLUMNS = ('last_updated', 'timestamp', 'pull_timestamp')
+
+
+class CoinRegistry:
+    """
+    The coin dimension keyed by CoinMarketCap id. Each coin gets a dense integer code
+    (0, 1, 2, ... in order of first appearance) so history frames can store one int32 per row
+    instead of the name/symbol/slug strings.
+
+    Lookups by id, symbol and slug are dict lookups. Symbols are not unique on CMC (several
+    coins can share a ticker), so a symbol maps to a list of ids and labels are disambiguated
+    with the slug when needed. When a coin is renamed, its latest labels win.
+    """
+
+    def __init__(self):
+        self.ids = []
+        self.names = []
+        self.symbols = []
+        self.slugs = []
+        self._codes = {}
+        self._by_symbol = {}
+        self._by_slug = {}
+        self._index = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, coin_id):
+        return int(coin_id) in self._codes
+
+    @classmethod
+    def from_frame(cls, df):
+        registry = cls()
+        registry.update(df)
+        return registry
+
+    def add(self, coin_id, name, symbol, slug=None):
+        """Registers a coin (or updates its labels) and returns its code."""
+        coin_id = int(coin_id)
+        code = self._codes.get(coin_id)
+        if code is None:
+            code = self._codes[coin_id] = len(self.ids)
+            self.ids.append(coin_id)
+            self.names.append(name)
+            self.symbols.append(symbol)
+            self.slugs.append(slug)
+            self._index = None
+        else:
+            self._by_symbol[self._symbol_key(self.symbols[code])].remove(coin_id)
+            if self.slugs[code] is not None:
+                self._by_slug.pop(self.slugs[code], None)
+            self.names[code], self.symbols[code], self.slugs[code] = name, symbol, slug
+
+        self._by_symbol.setdefault(self._symbol_key(symbol), []).append(coin_id)
+        if slug is not None:
+            self._by_slug[slug] = coin_id
+        return code
+
+    @staticmethod
+    def _symbol_key(symbol):
+        return str(symbol).upper()
+
+    def update(self, df):
+        """
+        Registers every coin of a frame with `id` and label columns (the last row per id wins)
+        and returns the int32 codes of the frame's rows.
+        """
+        columns = [column for column in ('id', *LABEL_COLUMNS) if column in df.columns]
+        latest = df[columns].drop_duplicates(subset=['id'], keep='last')
+        for row in latest.itertuples(index=False):
+            coin = row._asdict()
+            self.add(coin['id'], coin.get('name'), coin.get('symbol'), coin.get('slug'))
+        return self.codes(df['id'])
+
+    def codes(self, ids):
+        """int32 codes for an array of ids (vectorised). Raises KeyError for unknown ids."""
+        if self._index is None:
+            self._index = pd.Index(self.ids)
+        codes = self._index.get_indexer(np.asarray(ids))
+        if (codes < 0).any():
+            raise KeyError(f"Unknown coin ids: {np.asarray(ids)[codes < 0][:5].tolist()}")
+        return codes.astype(np.int32)
+
+    # --- Lookups ---
+
+    def get(self, coin_id):
+        """{'id', 'name', 'symbol', 'slug'} of a coin, or None."""
+        code = self._codes.get(int(coin_id))
+        if code is None:
+            return None
+        return {'id': self.ids[code], 'name': self.names[code], 'symbol': self.symbols[code],
+                'slug': self.slugs[code]}
+
+    def ids_for_symbol(self, symbol):
+        """All ids using a symbol (case-insensitive), in order of registration."""
+        return list(self._by_symbol.get(self._symbol_key(symbol), []))
+
+    def id_for_slug(self, slug):
+        return self._by_slug.get(slug)
+
+    def label(self, coin_id):
+        """'Name (SYMBOL)', with the slug added when another coin shares the symbol."""
+        coin = self.get(coin_id)
+        if coin is None:
+            return str(coin_id)
+        if len(self._by_symbol.get(self._symbol_key(coin['symbol']), [])) > 1 and coin['slug']:
+            return f"{coin['name']} ({coin['symbol']}, {coin['slug']})"
+        return f"{coin['name']} ({coin['symbol']})"
+
+    def categorical(self, codes, field='symbol'):
+        """
+        Labels for an array of codes as a Categorical, built with integer ops only: each
+        distinct label is stored once however many rows refer to it.
+        """
+        values = getattr(self, f"{field}s")
+        categories, label_codes = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+        return pd.Categorical.from_codes(label_codes[np.asarray(codes)], categories=categories)
+
+
+def compact_frame(df, registry=None, float32=False):
+    """
+    Compact copy of a history/snapshot frame: the name/symbol/slug strings are replaced by an
+    int32 `coin` code, `id` becomes int32, `cmc_rank` a nullable Int32 and timestamp strings
+    datetime64. With float32=True the percent-change columns are stored as float32 too.
+    Returns (frame, registry); pass the same registry when encoding several frames so their
+    codes agree.
+    """
+    registry = CoinRegistry() if registry is None else registry
+    codes = registry.update(df)
+    frame = df.drop(columns=[column for column in LABEL_COLUMNS if column in df.columns])
+    frame.insert(0, 'coin', codes)
+    frame['id'] = frame['id'].astype(np.int32)
+    if 'cmc_rank' in frame.columns:
+        frame['cmc_rank'] = pd.to_numeric(frame['cmc_rank']).round().astype('Int32')
+    for column in TIME_COLUMNS:
+        if column in frame.columns and not pd.api.types.is_datetime64_any_dtype(frame[column]):
+            frame[column] = pd.to_datetime(frame[column], format='ISO8601')
+    if float32:
+        for column in FLOAT32_COLUMNS:
+            if column in frame.columns:
+                frame[column] = frame[column].astype(np.float32)
+    return frame, registry
+
+
+def with_labels(frame, registry, fields=('name', 'symbol')):
+    """Adds categorical label columns back to a compact frame (for display or export)."""
+    return frame.assign(**{field: registry.categorical(frame['coin'].to_numpy(), field) for field in fields})
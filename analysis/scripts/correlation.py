@@ -0,0 +1,174 @@
+import os
+import numpy as np
+import pandas as pd
+
+
+class OnlineCorrelation:
+    """
+    Incremental cross-coin covariance/correlation of snapshot-to-snapshot returns.
+
+    Each update costs O(coins^2) and never touches past history. Statistics are kept per pair
+    over the snapshots where both coins were present (pairwise-complete, like DataFrame.corr):
+    - halflife=None: Welford updates, every return weighted equally;
+    - halflife=N: exponentially weighted, so older snapshots fade out after ~N snapshots.
+    """
+
+    def __init__(self, halflife=None):
+        self.halflife = halflife
+        self.coin_ids = []
+        self._index = {}
+        self.last_prices = np.empty(0)
+        self.last_timestamp = None
+        self.counts = np.zeros((0, 0))
+        self.means = np.zeros((0, 0))
+        self.comoments = np.zeros((0, 0))
+        self.moments = np.zeros((0, 0))
+
+    def _grow(self, new_coins):
+        for coin in new_coins:
+            self._index[coin] = len(self.coin_ids)
+            self.coin_ids.append(coin)
+        size = len(self.coin_ids)
+        old = self.counts.shape[0]
+
+        def pad(matrix):
+            grown = np.zeros((size, size))
+            grown[:old, :old] = matrix
+            return grown
+
+        self.counts, self.means = pad(self.counts), pad(self.means)
+        self.comoments, self.moments = pad(self.comoments), pad(self.moments)
+        self.last_prices = np.concatenate([self.last_prices, np.full(size - old, np.nan)])
+
+    def update(self, coin_ids, prices, timestamp=None):
+        """
+        Feeds one snapshot of prices. Returns against each coin's previous price are folded
+        into the statistics. A snapshot not newer than the last one (e.g. replayed after a
+        restart) is ignored. Returns True if the snapshot was applied.
+        """
+        if timestamp is not None:
+            timestamp = pd.Timestamp(timestamp)
+            if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+                return False
+            self.last_timestamp = timestamp
+
+        new_coins = [coin for coin in dict.fromkeys(coin_ids) if coin not in self._index]
+        if new_coins:
+            self._grow(new_coins)
+
+        rows = np.fromiter((self._index[coin] for coin in coin_ids), dtype=np.intp, count=len(coin_ids))
+        prices_now = np.full(len(self.coin_ids), np.nan)
+        prices_now[rows] = np.asarray(prices, dtype=np.float64)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = prices_now / self.last_prices - 1
+        returns[~np.isfinite(returns)] = np.nan
+        self.last_prices = np.where(np.isnan(prices_now), self.last_prices, prices_now)
+
+        present = ~np.isnan(returns)
+        if present.sum() < 2:
+            return True
+        x = np.where(present, returns, 0.0)
+        pairs = present[:, None] & present[None, :]
+        if self.halflife is not None:
+            # The EW mean of a pair starts at its first observation
+            self.means = np.where(pairs & (self.counts == 0), x[:, None], self.means)
+
+        # deltas[i, j]: coin i's return minus its running mean over the snapshots shared with j
+        deltas = np.where(pairs, x[:, None] - self.means, 0.0)
+        if self.halflife is None:
+            self.counts += pairs
+            with np.errstate(divide='ignore', invalid='ignore'):
+                self.means += np.where(pairs, deltas / self.counts, 0.0)
+            # Welford: (x - old mean of x) * (y - new mean of y)
+            updated_deltas = np.where(pairs, x[:, None] - self.means, 0.0)
+            self.comoments += deltas * updated_deltas.T
+            self.moments += deltas * updated_deltas
+        else:
+            alpha = 1 - 0.5 ** (1 / self.halflife)
+            decay = np.where(pairs, 1 - alpha, 1.0)
+            self.counts += pairs
+            self.means += alpha * deltas
+            self.comoments = decay * (self.comoments + alpha * deltas * deltas.T)
+            self.moments = decay * (self.moments + alpha * deltas ** 2)
+        return True
+
+    def update_from_frame(self, df, id_column='id', price_column='price', time_column='pull_timestamp'):
+        """Feeds a cleaned snapshot DataFrame (as returned by clean_and_format_data)."""
+        timestamp = df[time_column].iloc[0] if time_column in df.columns and len(df) else None
+        return self.update(df[id_column].tolist(), df[price_column].to_numpy(), timestamp)
+
+    # --- Queries ---
+
+    def covariance(self, min_periods=2):
+        """Pairwise covariance matrix of returns as a DataFrame (NaN below min_periods)."""
+        denominator = self.counts - 1 if self.halflife is None else np.ones_like(self.counts)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            covariance = self.comoments / denominator
+        covariance[self.counts < min_periods] = np.nan
+        return pd.DataFrame(covariance, index=self.coin_ids, columns=self.coin_ids)
+
+    def correlation(self, min_periods=2):
+        """Pairwise correlation matrix of returns as a DataFrame (NaN below min_periods)."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            correlation = self.comoments / np.sqrt(self.moments * self.moments.T)
+        correlation[(self.counts < min_periods) | ~np.isfinite(correlation)] = np.nan
+        return pd.DataFrame(np.clip(correlation, -1, 1), index=self.coin_ids, columns=self.coin_ids)
+
+    def correlation_to(self, coin_id, min_periods=2):
+        """Correlation of every other coin to `coin_id` (e.g. 1 for Bitcoin), highest first."""
+        series = self.correlation(min_periods)[coin_id].drop(coin_id)
+        return series.dropna().sort_values(ascending=False)
+
+    def top_pairs(self, k=10, min_periods=2, ascending=False):
+        """The k most (or, with ascending=True, least) correlated coin pairs."""
+        correlation = self.correlation(min_periods).to_numpy()
+        upper_i, upper_j = np.triu_indices(len(self.coin_ids), k=1)
+        values = correlation[upper_i, upper_j]
+        valid = ~np.isnan(values)
+        pairs = pd.DataFrame({
+            'coin_a': np.asarray(self.coin_ids, dtype=object)[upper_i[valid]],
+            'coin_b': np.asarray(self.coin_ids, dtype=object)[upper_j[valid]],
+            'correlation': values[valid],
+            'observations': self.counts[upper_i[valid], upper_j[valid]].astype(int),
+        })
+        if ascending:
+            return pairs.nsmallest(k, 'correlation').reset_index(drop=True)
+        return pairs.nlargest(k, 'correlation').reset_index(drop=True)
+
+    # --- Persistence, so restarts do not replay history ---
+
+    def save(self, path):
+        """Saves the state to a .npz file (written atomically)."""
+        tmp_path = path + '.tmp.npz'
+        np.savez(
+            tmp_path,
+            coin_ids=np.asarray(self.coin_ids),
+            halflife=np.asarray(np.nan if self.halflife is None else self.halflife),
+            last_timestamp=np.asarray('' if self.last_timestamp is None else self.last_timestamp.isoformat()),
+            last_prices=self.last_prices,
+            counts=self.counts,
+            means=self.means,
+            comoments=self.comoments,
+            moments=self.moments,
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, halflife=None):
+        """Loads a saved state, or returns a fresh tracker if the file does not exist."""
+        if not os.path.exists(path):
+            return cls(halflife)
+        with np.load(path) as state:
+            saved_halflife = float(state['halflife'])
+            tracker = cls(None if np.isnan(saved_halflife) else saved_halflife)
+            tracker.coin_ids = state['coin_ids'].tolist()
+            tracker._index = {coin: i for i, coin in enumerate(tracker.coin_ids)}
+            last_timestamp = str(state['last_timestamp'])
+            tracker.last_timestamp = pd.Timestamp(last_timestamp) if last_timestamp else None
+            tracker.last_prices = state['last_prices']
+            tracker.counts = state['counts']
+            tracker.means = state['means']
+            tracker.comoments = state['comoments']
+            tracker.moments = state['moments']
+        return tracker
@@ -0,0 +1,55 @@
+import numpy as np
+
+# Leaderboards used by the dashboard's "Key Coin Analysis" and the notebook:
+# name -> (metric column, True for highest values first / False for lowest first)
+DEFAULT_LEADERBOARDS = {
+    'gainers': ('percent_change_24h', True),
+    'losers': ('percent_change_24h', False),
+    'volume': ('volume_24h', True),
+    'market_cap': ('market_cap', True),
+}
+
+
+def top_k_indices(values, k, largest=True):
+    """
+    Positions of the k largest (or smallest) values, best first, ignoring NaNs.
+    Uses argpartition, so the cost is O(n + k log k) instead of a full O(n log n) sort.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    valid = np.flatnonzero(~np.isnan(values))
+    k = min(k, len(valid))
+    if k == 0:
+        return np.empty(0, dtype=np.intp)
+
+    keys = -values[valid] if largest else values[valid]
+    candidates = np.argpartition(keys, k - 1)[:k]
+    ordered = candidates[np.argsort(keys[candidates], kind='stable')]
+    return valid[ordered]
+
+
+def top_k_frame(df, column, k=10, largest=True):
+    """Rows of `df` with the k largest (or smallest) values of `column`, best first."""
+    return df.iloc[top_k_indices(df[column].to_numpy(dtype=np.float64, na_value=np.nan), k, largest)]
+
+
+def compute_leaderboards(df, k=5, leaderboards=DEFAULT_LEADERBOARDS, label_columns=('name', 'symbol')):
+    """
+    Computes every leaderboard in one pass over the frame's columns.
+    Each metric column is converted to a NumPy array once and shared by all leaderboards
+    that rank on it (e.g. gainers and losers).
+
+    Returns a dict of leaderboard name -> list of records, for example
+    {'gainers': [{'name': 'Bitcoin', 'symbol': 'BTC', 'value': 3.1}, ...], ...}.
+    """
+    labels = {column: df[column].to_numpy() for column in label_columns}
+    metrics = {}
+    boards = {}
+    for board, (column, largest) in leaderboards.items():
+        if column not in metrics:
+            metrics[column] = df[column].to_numpy(dtype=np.float64, na_value=np.nan)
+        positions = top_k_indices(metrics[column], k, largest)
+        boards[board] = [
+            {**{label: values[i] for label, values in labels.items()}, 'value': float(metrics[column][i])}
+            for i in positions
+        ]
+    return boards
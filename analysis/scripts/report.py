@@ -0,0 +1,404 @@
+"""
+Headless batch report over the cleaned price history (the scripted replacement for
+analize_data.ipynb).
+
+The history CSV is read once and shared by every analysis; the "latest row per coin"
+frame and the per-coin volatility are computed once and reused. Charts are rendered in
+parallel on a process pool. Every artifact (a CSV table plus a PNG chart) is cached under
+a key built from the data version and the analysis parameters, so a re-run only redoes
+the analyses whose input or parameters changed, and does not even load the CSV when
+nothing did.
+
+    python analysis/scripts/report.py --csv analysis/cleaned-data/cleaned_data.csv --out analysis/reports
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from coin_registry import CoinRegistry
+from leaderboard import top_k_frame
+from rolling_metrics import RollingMetrics
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+DEFAULT_CSV = os.path.join(ROOT, 'cleaned-data', 'cleaned_data.csv')
+DEFAULT_OUT = os.path.join(ROOT, 'reports')
+MANIFEST_FILE = 'manifest.json'
+# Bump when an analysis or chart changes in a way that should invalidate cached artifacts
+REPORT_VERSION = 2
+
+# Labels repeat on every row, so they are read as categoricals (each string stored once)
+HISTORY_DTYPES = {
+    'id': 'int32', 'name': 'category', 'symbol': 'category', 'cmc_rank': 'float32',
+    'price': 'float64', 'volume_24h': 'float64', 'market_cap': 'float64',
+    'percent_change_1h': 'float64', 'percent_change_24h': 'float64', 'percent_change_7d': 'float64',
+}
+# Coin health score components (notebook section "coin health") and their weights
+HEALTH_WEIGHTS = {
+    'percent_change_1h': 0.10,
+    'percent_change_24h': 0.20,
+    'percent_change_7d': 0.20,
+    'volume_24h': 0.25,
+    'market_cap': 0.25,
+}
+GREEN, RED = '#386641', '#E43636'
+
+
+def data_version(path, chunk_size=1 << 20):
+    """
+    Fingerprint of the history file: a hash of its whole content, read in chunks. Hashing is
+    far cheaper than parsing the CSV, and unlike a size or sampled-bytes check it also catches
+    a re-export that changes rows in the middle while keeping the same size.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def load_history(path):
+    """Reads the history CSV once, with fixed dtypes and parsed timestamps."""
+    df = pd.read_csv(path, usecols=lambda column: column in {*HISTORY_DTYPES, 'timestamp', 'last_updated'},
+                     dtype=HISTORY_DTYPES)
+    df['timestamp'] = pd.to_datetime(df['timestamp'], format='ISO8601', errors='coerce')
+    return df.dropna(subset=['timestamp'])
+
+
+class History:
+    """The loaded history plus derived frames shared by all analyses (each computed once)."""
+
+    def __init__(self, df):
+        self.df = df
+
+    @cached_property
+    def latest(self):
+        """Most recent row per coin id."""
+        return self.df.sort_values('timestamp', kind='stable').drop_duplicates(subset=['id'], keep='last')
+
+    @cached_property
+    def per_coin(self):
+        """Percentage-return volatility and average market cap per coin id, with latest labels."""
+        metrics = RollingMetrics.from_frame(self.df, value_column='price', time_column='timestamp', id_column='id')
+        stats = pd.DataFrame({
+            'volatility_std': metrics.total_volatility(),
+            'avg_market_cap': self.df.groupby('id')['market_cap'].mean(),
+        })
+        labels = self.latest.set_index('id')[['name', 'symbol']]
+        return stats.join(labels).rename_axis('id').reset_index()
+
+    @cached_property
+    def registry(self):
+        return CoinRegistry.from_frame(self.latest)
+
+    def coin_id(self, symbol):
+        """Id for a symbol; when several coins share it, the one with the largest market cap."""
+        ids = self.registry.ids_for_symbol(symbol)
+        if not ids:
+            return None
+        market_caps = self.latest.set_index('id')['market_cap']
+        return max(ids, key=lambda coin_id: market_caps.get(coin_id, float('-inf')))
+
+
+# --- Analyses: each returns the table behind one artifact ---
+
+def daily_change(history, k=5):
+    """Top k gainers and losers by 24h price change."""
+    gainers = top_k_frame(history.latest, 'percent_change_24h', k=k).assign(status='Gainer')
+    losers = top_k_frame(history.latest, 'percent_change_24h', k=k, largest=False).assign(status='Loser')
+    return pd.concat([gainers, losers])[['id', 'name', 'symbol', 'percent_change_24h', 'status']]
+
+
+def top_volatility(history, k=10):
+    """Coins with the highest standard deviation of percentage price change."""
+    return top_k_frame(history.per_coin, 'volatility_std', k=k)
+
+
+def cap_vs_volatility(history):
+    """Average market cap against volatility for every coin with enough history."""
+    return history.per_coin.dropna(subset=['volatility_std', 'avg_market_cap'])
+
+
+def leaderboard(history, column, k=10, largest=True):
+    """Top (or bottom) k coins of the latest snapshot by `column`."""
+    return top_k_frame(history.latest, column, k=k, largest=largest)[['id', 'name', 'symbol', column]]
+
+
+def health_score(history, k=3):
+    """Min-max normalised health components (the radar axes) and weighted score of the top k coins."""
+    latest = history.latest
+    components = latest[list(HEALTH_WEIGHTS)].astype('float64')
+    low, high = components.min(), components.max()
+    normalised = (components - low) / (high - low).replace(0, np.nan)
+    table = normalised.fillna(0.0).assign(id=latest['id'], name=latest['name'], symbol=latest['symbol'])
+    table['health_score'] = sum(table[column] * weight for column, weight in HEALTH_WEIGHTS.items())
+    return top_k_frame(table, 'health_score', k=k)[['id', 'name', 'symbol', *HEALTH_WEIGHTS, 'health_score']]
+
+
+def coin_series(history, symbol):
+    """Price and 24h volume over time for one coin."""
+    coin_id = history.coin_id(symbol)
+    if coin_id is None:
+        return pd.DataFrame(columns=['timestamp', 'price', 'volume_24h'])
+    rows = history.df.loc[history.df['id'] == coin_id, ['timestamp', 'price', 'volume_24h']]
+    return rows.sort_values('timestamp', kind='stable')
+
+
+# --- Charts: rendered in worker processes (matplotlib only imported there) ---
+
+def _pyplot():
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def _palette(n, start, end):
+    from matplotlib.colors import LinearSegmentedColormap
+    cmap = LinearSegmentedColormap.from_list('blend', [start, end])
+    return [cmap(i / max(n - 1, 1)) for i in range(n)]
+
+
+def _money(x, pos=None):
+    for divisor, suffix in ((1e12, 'T'), (1e9, 'B'), (1e6, 'M'), (1e3, 'K')):
+        if abs(x) >= divisor:
+            return f'${x / divisor:.0f}{suffix}'
+    return f'${x:.0f}'
+
+
+def chart_daily_change(table, title, path):
+    plt = _pyplot()
+    fig, ax = plt.subplots(figsize=(14, 8))
+    colors = [GREEN if status == 'Gainer' else RED for status in table['status']]
+    # Bars are placed by position: coins sharing a symbol must not be merged into one bar
+    positions = range(len(table))
+    ax.bar(positions, table['percent_change_24h'], color=colors, edgecolor='gray', linewidth=0.5)
+    ax.set_xticks(positions, table['symbol'].astype(str))
+    ax.axhline(0, color='black', linewidth=2.5)
+    for x, height in enumerate(table['percent_change_24h']):
+        ax.text(x, height, f'{height:.2f}%', ha='center', va='bottom' if height >= 0 else 'top',
+                fontsize=11, fontweight='bold', color='#333333')
+    ax.set_ylabel('Price Change (%)')
+    ax.set_xlabel('Coin Symbol')
+    ax.set_title(title, fontsize=18, fontweight='bold')
+    _save(fig, path)
+
+
+def chart_barh(table, title, path, column, xlabel, start=GREEN, end=RED, money=False):
+    plt = _pyplot()
+    fig, ax = plt.subplots(figsize=(12, 8))
+    positions = range(len(table))
+    ax.barh(positions, table[column], color=_palette(len(table), start, end))
+    ax.set_yticks(positions, table['name'].astype(str))
+    ax.invert_yaxis()
+    if money:
+        from matplotlib.ticker import FuncFormatter
+        ax.xaxis.set_major_formatter(FuncFormatter(_money))
+    ax.grid(axis='x', linestyle='--', alpha=0.6)
+    ax.set_xlabel(xlabel)
+    ax.set_title(title, fontsize=18, fontweight='bold')
+    _save(fig, path)
+
+
+def chart_scatter(table, title, path):
+    plt = _pyplot()
+    fig, ax = plt.subplots(figsize=(12, 8))
+    ax.scatter(table['avg_market_cap'], table['volatility_std'], s=100, alpha=0.7, c='crimson', edgecolors='w')
+    for row in table.itertuples():
+        ax.text(row.avg_market_cap, row.volatility_std, row.symbol, fontsize=9, ha='center', va='bottom')
+    ax.set_xscale('log')
+    ax.set_yscale('log')
+    ax.set_xlabel('Average Market Cap')
+    ax.set_ylabel('Price Volatility (%)')
+    ax.set_title(title, fontsize=18, fontweight='bold')
+    _save(fig, path)
+
+
+def chart_radar(table, title, path):
+    plt = _pyplot()
+    axes = list(HEALTH_WEIGHTS)
+    angles = np.linspace(0, 2 * np.pi, len(axes), endpoint=False).tolist()
+    fig, ax = plt.subplots(figsize=(8, 8), subplot_kw={'polar': True})
+    for row, color in zip(table.itertuples(index=False), _palette(len(table), GREEN, '#A7C957')):
+        values = [getattr(row, column) for column in axes]
+        ax.plot(angles + angles[:1], values + values[:1], color=color, linewidth=2,
+                label=f'{row.name} ({row.health_score:.2f})')
+        ax.fill(angles + angles[:1], values + values[:1], color=color, alpha=0.2)
+    ax.set_xticks(angles)
+    ax.set_xticklabels(['1h', '24h', '7d', 'Volume', 'Market cap'])
+    ax.set_ylim(0, 1)
+    ax.legend(loc='upper right', bbox_to_anchor=(1.3, 1.1))
+    ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
+    _save(fig, path)
+
+
+def chart_price_volume(table, title, path):
+    plt = _pyplot()
+    fig, price_ax = plt.subplots(figsize=(12, 6))
+    price_ax.plot(table['timestamp'], table['price'], color='tab:blue')
+    price_ax.set_ylabel('Price (USD)', color='tab:blue')
+    volume_ax = price_ax.twinx()
+    volume_ax.plot(table['timestamp'], table['volume_24h'], color='tab:orange', linestyle='--')
+    volume_ax.set_ylabel('Volume', color='tab:orange')
+    price_ax.set_xlabel('Timestamp')
+    price_ax.set_title(title)
+    _save(fig, path)
+
+
+def _save(fig, path):
+    tmp_path = path + '.tmp.png'
+    try:
+        fig.tight_layout()
+        fig.savefig(tmp_path, dpi=100)
+    finally:
+        # Unregisters the figure from pyplot; pool workers and --workers 0 render many charts
+        _pyplot().close(fig)
+    os.replace(tmp_path, path)
+
+
+def _render(chart, table, title, path, options):
+    started = time.perf_counter()
+    chart(table, title, path, **options)
+    return time.perf_counter() - started
+
+
+# --- Report plan and cache ---
+
+def report_plan(coins=('BTC', 'ETH'), top=10, movers=5):
+    """
+    Artifact name -> (analysis, its parameters, chart, title, chart options).
+    The parameters are part of the cache key, so changing one only re-runs that artifact.
+    """
+    plan = {
+        'daily_change': (daily_change, {'k': movers}, chart_daily_change,
+                         f'Top {movers} Daily Gainers vs. Top {movers} Daily Losers', {}),
+        'top_volatility': (top_volatility, {'k': top}, chart_barh, f'Top {top} Most Volatile Coins',
+                           {'column': 'volatility_std', 'xlabel': 'Std. of Percentage Price Change (%)',
+                            'start': RED, 'end': GREEN}),
+        'cap_vs_volatility': (cap_vs_volatility, {}, chart_scatter, 'Market Cap vs. Price Volatility', {}),
+        'top_volume': (leaderboard, {'column': 'volume_24h', 'k': top}, chart_barh,
+                       f'Top {top} Coins by 24h Trading Volume',
+                       {'column': 'volume_24h', 'xlabel': 'Trading Volume (24h)', 'money': True}),
+        'top_market_cap': (leaderboard, {'column': 'market_cap', 'k': top}, chart_barh,
+                           f'Top {top} Coins by Market Capitalization',
+                           {'column': 'market_cap', 'xlabel': 'Market Capitalization', 'money': True}),
+        'bottom_market_cap': (leaderboard, {'column': 'market_cap', 'k': top, 'largest': False}, chart_barh,
+                              f'{top} Coins with the Lowest Market Capitalization',
+                              {'column': 'market_cap', 'xlabel': 'Market Capitalization', 'money': True,
+                               'start': RED, 'end': GREEN}),
+        'health_score': (health_score, {'k': 3}, chart_radar, 'Coin Health Score (normalised components)', {}),
+    }
+    for symbol in coins:
+        plan[f'coin_{symbol.upper()}'] = (coin_series, {'symbol': symbol}, chart_price_volume,
+                                          f'{symbol.upper()} - Price and Volume Over Time', {})
+    return plan
+
+
+def cache_key(version, name, analysis, params):
+    payload = json.dumps({'data': version, 'artifact': name, 'analysis': analysis.__name__,
+                          'params': params, 'report': REPORT_VERSION}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def _load_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST_FILE)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _save_manifest(out_dir, manifest):
+    path = os.path.join(out_dir, MANIFEST_FILE)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+def generate_report(csv_path=DEFAULT_CSV, out_dir=DEFAULT_OUT, plan=None, workers=None, charts=True, force=False):
+    """
+    Builds every artifact of `plan` whose cache key changed (or all of them with force=True).
+    Returns {artifact name: 'cached' | 'built'} and prints per-step timings.
+    """
+    plan = report_plan() if plan is None else plan
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = _load_manifest(out_dir)
+    version = data_version(csv_path)
+
+    stale = {}
+    status = {}
+    for name, (analysis, params, chart, title, options) in plan.items():
+        key = cache_key(version, name, analysis, params)
+        files = [f'{name}.csv'] + ([f'{name}.png'] if charts else [])
+        cached = manifest.get(name, {})
+        if (not force and cached.get('key') == key and set(files) <= set(cached.get('files', []))
+                and all(os.path.exists(os.path.join(out_dir, file)) for file in files)):
+            status[name] = 'cached'
+        else:
+            stale[name] = key
+    if not stale:
+        print(f"All {len(plan)} artifacts are up to date (data version {version}).")
+        return status
+
+    started = time.perf_counter()
+    history = History(load_history(csv_path))
+    print(f"Loaded {len(history.df):,} rows in {time.perf_counter() - started:.2f}s")
+
+    tables = {}
+    for name in stale:
+        analysis, params = plan[name][:2]
+        step = time.perf_counter()
+        tables[name] = analysis(history, **params)
+        tables[name].to_csv(os.path.join(out_dir, f'{name}.csv'), index=False)
+        print(f"  {name:<20} {len(tables[name]):>8,} rows {time.perf_counter() - step:>8.3f}s")
+
+    if charts:
+        step = time.perf_counter()
+        jobs = [(plan[name][2], tables[name], plan[name][3], os.path.join(out_dir, f'{name}.png'), plan[name][4])
+                for name in stale]
+        if workers == 0:
+            durations = [_render(*job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=workers or min(len(jobs), os.cpu_count() or 1)) as executor:
+                durations = list(executor.map(_render, *zip(*jobs)))
+        print(f"Rendered {len(jobs)} charts in {time.perf_counter() - step:.2f}s "
+              f"({sum(durations):.2f}s of rendering)")
+
+    for name, key in stale.items():
+        manifest[name] = {'key': key, 'files': [f'{name}.csv'] + ([f'{name}.png'] if charts else [])}
+        status[name] = 'built'
+    _save_manifest(out_dir, manifest)
+    print(f"Report written to {out_dir} ({len(stale)} built, {len(plan) - len(stale)} cached) "
+          f"in {time.perf_counter() - started:.2f}s")
+    return status
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch crypto market report (tables and charts).")
+    parser.add_argument('--csv', default=DEFAULT_CSV, help="cleaned history CSV")
+    parser.add_argument('--out', default=DEFAULT_OUT, help="output directory")
+    parser.add_argument('--coins', nargs='*', default=['BTC', 'ETH'], help="symbols for price/volume charts")
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--movers', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=None, help="chart processes (0 renders in-process)")
+    parser.add_argument('--no-charts', action='store_true', help="only write the tables")
+    parser.add_argument('--force', action='store_true', help="ignore the cache")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.csv):
+        print(f"Error: {args.csv} not found.")
+        return 1
+    generate_report(args.csv, args.out, report_plan(args.coins, args.top, args.movers),
+                    args.workers, not args.no_charts, args.force)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+import numpy as np
+import pandas as pd
+
+
+def forward_fill(matrix, limit=None):
+    """
+    Forward-fills NaNs along the time axis (columns) of a coins x time matrix.
+    With `limit`, a value is carried forward over at most `limit` missing snapshots.
+    """
+    n_coins, n_times = matrix.shape
+    positions = np.arange(n_times)
+    last_valid = np.where(~np.isnan(matrix), positions, -1)
+    np.maximum.accumulate(last_valid, axis=1, out=last_valid)
+
+    filled = matrix[np.arange(n_coins)[:, None], np.maximum(last_valid, 0)]
+    missing = last_valid < 0
+    if limit is not None:
+        missing |= (positions - last_valid) > limit
+    filled[missing] = np.nan
+    return filled
+
+
+def rolling_sum(matrix, window):
+    """NaN-aware rolling sum and count over the last `window` columns, via cumulative sums."""
+    valid = ~np.isnan(matrix)
+    cumulative = np.cumsum(np.where(valid, matrix, 0.0), axis=1)
+    counts = np.cumsum(valid, axis=1)
+
+    sums = cumulative.copy()
+    sums[:, window:] -= cumulative[:, :-window]
+    totals = counts.copy()
+    totals[:, window:] -= counts[:, :-window]
+    return sums, totals
+
+
+class RollingMetrics:
+    """
+    Snapshot history as a dense coins x time NumPy matrix (one row per coin, one column per
+    aligned snapshot timestamp, NaN where a coin is missing from a snapshot).
+    All metrics are computed for every coin at once. New snapshots are appended as a column
+    in amortized O(coins) time; nothing already stored is recomputed.
+    """
+
+    def __init__(self, align='1min', max_gap=2, capacity=256):
+        # Snapshot timestamps are floored to `align` so rows written a few ms apart share a column
+        self.align = align
+        # Missing snapshots bridged by forward-filling when computing returns
+        self.max_gap = max_gap
+        self.coin_ids = []
+        self._rows = {}
+        self._times = []
+        self._data = np.full((0, capacity), np.nan)
+        self._running_max = np.empty(0)
+
+    @classmethod
+    def from_frame(cls, df, value_column='price', time_column='timestamp', id_column='id', **kwargs):
+        """Builds the matrix from a long-format history frame (one row per coin per snapshot)."""
+        metrics = cls(**kwargs)
+        times = pd.to_datetime(df[time_column], format='ISO8601', errors='coerce').dt.floor(metrics.align)
+        frame = pd.DataFrame({'time': times, 'coin': df[id_column], 'value': df[value_column]})
+        frame = frame.dropna(subset=['time'])
+
+        # Last observation wins when a coin appears twice within the same aligned snapshot
+        wide = frame.pivot_table(index='coin', columns='time', values='value', aggfunc='last', sort=True)
+        metrics.coin_ids = wide.index.tolist()
+        metrics._rows = {coin: row for row, coin in enumerate(metrics.coin_ids)}
+        metrics._times = wide.columns.tolist()
+
+        n_times = len(metrics._times)
+        metrics._data = np.full((len(metrics.coin_ids), max(n_times * 2, 256)), np.nan)
+        metrics._data[:, :n_times] = wide.to_numpy(dtype=np.float64)
+        metrics._running_max = np.fmax.reduce(metrics.values, axis=1, initial=-np.inf)
+        return metrics
+
+    @property
+    def timestamps(self):
+        return pd.DatetimeIndex(self._times)
+
+    @property
+    def values(self):
+        """View of the filled part of the coins x time matrix."""
+        return self._data[:, :len(self._times)]
+
+    def append(self, timestamp, coin_ids, values):
+        """
+        Adds one snapshot as a new column. Coins not seen before get a new row (NaN history).
+        A snapshot whose aligned timestamp equals the last column updates that column instead.
+        """
+        timestamp = pd.Timestamp(timestamp).floor(self.align)
+        if self._times and timestamp < self._times[-1]:
+            raise ValueError(f"Snapshot {timestamp} is older than the last one ({self._times[-1]}).")
+
+        new_coins = [coin for coin in coin_ids if coin not in self._rows]
+        if new_coins:
+            for coin in new_coins:
+                self._rows[coin] = len(self.coin_ids)
+                self.coin_ids.append(coin)
+            extra = np.full((len(new_coins), self._data.shape[1]), np.nan)
+            self._data = np.vstack([self._data, extra])
+            self._running_max = np.concatenate([self._running_max, np.full(len(new_coins), -np.inf)])
+
+        if not self._times or timestamp > self._times[-1]:
+            if len(self._times) == self._data.shape[1]:
+                # Double the capacity so appends stay amortized O(coins)
+                grown = np.full((self._data.shape[0], self._data.shape[1] * 2), np.nan)
+                grown[:, :len(self._times)] = self.values
+                self._data = grown
+            self._times.append(timestamp)
+
+        column = len(self._times) - 1
+        rows = np.fromiter((self._rows[coin] for coin in coin_ids), dtype=np.intp, count=len(coin_ids))
+        self._data[rows, column] = np.asarray(values, dtype=np.float64)
+        self._running_max = np.fmax(self._running_max, self._data[:, column])
+
+    # --- Full-history metrics (one vectorized pass over the whole matrix) ---
+
+    def returns(self, periods=1):
+        """Percentage returns over `periods` snapshots, bridging gaps of up to max_gap snapshots."""
+        prices = forward_fill(self.values, self.max_gap)
+        result = np.full(prices.shape, np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result[:, periods:] = (prices[:, periods:] / prices[:, :-periods] - 1) * 100
+        # No return is reported at a snapshot where the coin itself is missing
+        result[np.isnan(self.values)] = np.nan
+        return result
+
+    def moving_average(self, window):
+        """Rolling mean of the value over the last `window` snapshots (NaN-aware)."""
+        sums, counts = rolling_sum(self.values, window)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(counts > 0, sums / counts, np.nan)
+
+    def volatility(self, window):
+        """Rolling sample standard deviation of percentage returns over `window` snapshots."""
+        returns = self.returns()
+        sums, counts = rolling_sum(returns, window)
+        squares, _ = rolling_sum(returns ** 2, window)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            variance = (squares - sums ** 2 / counts) / (counts - 1)
+        return np.where(counts > 1, np.sqrt(np.maximum(variance, 0)), np.nan)
+
+    def drawdown(self):
+        """Percentage drop from the running maximum up to each snapshot."""
+        values = self.values
+        running_max = np.fmax.accumulate(np.where(np.isnan(values), -np.inf, values), axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result = (values / running_max - 1) * 100
+        return np.where(np.isfinite(running_max), result, np.nan)
+
+    def total_volatility(self):
+        """Standard deviation of all percentage returns per coin, as a Series indexed by coin."""
+        returns = self.returns()
+        enough = np.sum(~np.isnan(returns), axis=1) > 1
+        std = np.full(len(self.coin_ids), np.nan)
+        std[enough] = np.nanstd(returns[enough], axis=1, ddof=1)
+        return pd.Series(std, index=self.coin_ids, name='volatility')
+
+    # --- Latest-snapshot metrics (only the trailing window is touched) ---
+
+    def latest(self, window=20):
+        """
+        Metrics at the newest snapshot for every coin, computed from the trailing
+        `window + 1 + max_gap` columns only, so the cost per new snapshot does not grow with
+        history length. (With max_gap=None, gaps are only bridged within that tail.)
+        """
+        n_times = len(self._times)
+        lookback = min(n_times, window + 1 + (self.max_gap or 0))
+        tail = RollingMetrics(self.align, self.max_gap, capacity=1)
+        tail._data = self._data[:, n_times - lookback:n_times]
+        tail._times = self._times[n_times - lookback:]
+        if not lookback:
+            nan_column = np.full(len(self.coin_ids), np.nan)
+            returns = volatility = moving_average = last_value = nan_column
+        else:
+            last_value = tail.values[:, -1]
+            returns = tail.returns()[:, -1]
+            volatility = tail.volatility(window)[:, -1]
+            moving_average = tail.moving_average(window)[:, -1]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            drawdown = (last_value / self._running_max - 1) * 100
+        return pd.DataFrame({
+            'value': last_value,
+            'return': returns,
+            'volatility': volatility,
+            'moving_average': moving_average,
+            'drawdown': np.where(np.isfinite(self._running_max), drawdown, np.nan),
+        }, index=pd.Index(self.coin_ids, name='coin'))
+
+    def to_frame(self, matrix=None):
+        """Wraps a coins x time matrix (default: the values) as a DataFrame."""
+        return pd.DataFrame(self.values if matrix is None else matrix, index=self.coin_ids, columns=self.timestamps)
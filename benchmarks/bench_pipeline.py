@@ -0,0 +1,280 @@
+"""
+Offline benchmark for the clean -> store -> export -> load pipeline.
+
+Every case runs in a fresh process (so peak RSS belongs to that case alone) against
+synthetic CoinMarketCap payloads and synthetic crypto_prices history; no network or
+API key is needed. Results are written as JSON and compared against a stored baseline.
+
+    python benchmarks/bench_pipeline.py --quick
+    python benchmarks/bench_pipeline.py --save-baseline
+
+The committed benchmarks/baseline.json is a --quick reference run. Timings depend on the
+machine, so save a local baseline before changing code and compare against that one.
+Only cases with the same stage and size as a baseline entry are compared.
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(ROOT, 'cleaning'))
+sys.path.append(os.path.join(ROOT, 'analysis', 'local-automation'))
+sys.path.append(os.path.join(ROOT, 'dashboard'))
+
+from synthetic_cmc import synthetic_history_rows, synthetic_payload
+
+# Benchmark runs should not end up in the pipeline's own stage metrics
+os.environ.setdefault('PIPELINE_METRICS_FILE', '')
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_FILE = os.path.join(BENCH_DIR, 'results.json')
+BASELINE_FILE = os.path.join(BENCH_DIR, 'baseline.json')
+WORK_DIR = os.path.join(BENCH_DIR, '.work')
+
+COIN_SIZES = [100, 1_000, 5_000]
+HISTORY_SIZES = [10_000, 1_000_000, 10_000_000]
+QUICK_COIN_SIZES = [100, 1_000]
+QUICK_HISTORY_SIZES = [10_000, 100_000]
+# A case is a regression when it is this much slower than the baseline
+TOLERANCE = 0.25
+# ...and slower by at least this many seconds, so millisecond cases do not flag on noise
+MIN_SLOWDOWN_S = 0.005
+
+
+def _peak_rss_mb():
+    """Peak resident set size of this process in MB, or None where `resource` is unavailable."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+
+# --- Fixtures (built once per history size and reused across runs) ---
+
+def history_fixture(rows, work_dir=WORK_DIR):
+    """Path of a crypto_prices database with `rows` rows and its full CSV export."""
+    from csv_collector import bulk_insert_rows, connect_db, db_to_csv
+
+    os.makedirs(work_dir, exist_ok=True)
+    db_path = os.path.join(work_dir, f"history-{rows}.db")
+    csv_path = os.path.join(work_dir, f"history-{rows}.csv")
+    if not os.path.exists(csv_path):
+        for path in (db_path, db_path + '-wal', db_path + '-shm'):
+            if os.path.exists(path):
+                os.remove(path)
+        print(f"Building {rows:,}-row history fixture...")
+        conn = connect_db(db_path)
+        try:
+            bulk_insert_rows(conn, synthetic_history_rows(rows))
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        finally:
+            conn.close()
+        with contextlib.redirect_stdout(io.StringIO()):
+            db_to_csv(db_path, csv_path, incremental=False)
+    return db_path, csv_path
+
+
+def _copy_db(db_path, target):
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(target + suffix):
+            os.remove(target + suffix)
+    shutil.copyfile(db_path, target)
+    return target
+
+
+# --- Stages: each returns (callable to time, rows processed) after untimed setup ---
+
+def stage_clean(size, scratch):
+    from data_cleaner_and_puller import clean_and_format_data
+    payload = synthetic_payload(size)
+    # Warm-up call so one-off lazy imports inside pandas are not timed
+    clean_and_format_data(payload)
+    return lambda: clean_and_format_data(payload), size
+
+
+def stage_save_csv(size, scratch):
+    from data_cleaner_and_puller import clean_and_format_data, save_updated_data
+    df = clean_and_format_data(synthetic_payload(size))
+    path = os.path.join(scratch, 'updated_file.csv')
+    return lambda: save_updated_data(df, path), size
+
+
+def stage_db_insert_coins(size, scratch):
+    from csv_collector import process_and_append_to_db
+    payload = synthetic_payload(size)
+    db_path = os.path.join(scratch, 'insert.db')
+    return lambda: process_and_append_to_db(payload, db_path), size
+
+
+def stage_db_insert_history(size, scratch):
+    from csv_collector import process_and_append_to_db
+    db_path, _ = history_fixture(size)
+    payload = synthetic_payload(100)
+    target = _copy_db(db_path, os.path.join(scratch, 'insert.db'))
+    return lambda: process_and_append_to_db(payload, target), 100
+
+
+def stage_db_to_csv_full(size, scratch):
+    from csv_collector import db_to_csv
+    db_path, _ = history_fixture(size)
+    target = os.path.join(scratch, 'export.csv')
+    return lambda: db_to_csv(db_path, target, incremental=False), size
+
+
+def stage_db_to_csv_incremental(size, scratch):
+    from csv_collector import db_to_csv, process_and_append_to_db, watermark_path
+    db_path, csv_path = history_fixture(size)
+    target_db = _copy_db(db_path, os.path.join(scratch, 'export.db'))
+    target_csv = os.path.join(scratch, 'export.csv')
+    shutil.copyfile(csv_path, target_csv)
+    shutil.copyfile(watermark_path(csv_path), watermark_path(target_csv))
+    process_and_append_to_db(synthetic_payload(100), target_db)
+    return lambda: db_to_csv(target_db, target_csv), 100
+
+
+def stage_load_latest(size, scratch):
+    from data_loader import read_latest_snapshot
+    _, csv_path = history_fixture(size)
+    return lambda: read_latest_snapshot(csv_path), size
+
+
+STAGES = {
+    'clean_and_format_data': (stage_clean, 'coins'),
+    'save_updated_data': (stage_save_csv, 'coins'),
+    'process_and_append_to_db@coins': (stage_db_insert_coins, 'coins'),
+    'process_and_append_to_db@history': (stage_db_insert_history, 'history'),
+    'db_to_csv@full': (stage_db_to_csv_full, 'history'),
+    'db_to_csv@incremental': (stage_db_to_csv_incremental, 'history'),
+    'load_latest_data': (stage_load_latest, 'history'),
+}
+
+
+def _run_case(stage, size, scratch, queue):
+    # Runs in a child process: untimed setup, then one timed call
+    os.makedirs(scratch, exist_ok=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        run, rows = STAGES[stage][0](size, scratch)
+        rss_before = _peak_rss_mb()
+        started = time.perf_counter()
+        run()
+        wall = time.perf_counter() - started
+    queue.put({'wall_s': wall, 'rows': rows, 'rss_before_mb': rss_before, 'peak_rss_mb': _peak_rss_mb()})
+
+
+def run_case(stage, size, repeat=3, work_dir=WORK_DIR):
+    """Runs one case `repeat` times, each in a fresh process; keeps the fastest run."""
+    context = multiprocessing.get_context('spawn')
+    if STAGES[stage][1] == 'history':
+        # Built in a child as well: on Linux the peak RSS of a process survives exec into
+        # its children, so the parent has to stay small
+        builder = context.Process(target=history_fixture, args=(size, work_dir))
+        builder.start()
+        builder.join()
+
+    runs = []
+    for attempt in range(repeat):
+        scratch = os.path.join(work_dir, f"scratch-{os.getpid()}-{attempt}")
+        queue = context.Queue()
+        process = context.Process(target=_run_case, args=(stage, size, scratch, queue))
+        process.start()
+        process.join()
+        shutil.rmtree(scratch, ignore_errors=True)
+        if process.exitcode != 0:
+            raise RuntimeError(f"Benchmark case {stage} @ {size} failed (exit code {process.exitcode}).")
+        runs.append(queue.get(timeout=10))
+
+    best = min(runs, key=lambda r: r['wall_s'])
+    return {
+        'stage': stage,
+        'scale': STAGES[stage][1],
+        'size': size,
+        'wall_s': best['wall_s'],
+        'rows': best['rows'],
+        'rows_per_s': best['rows'] / best['wall_s'] if best['wall_s'] > 0 else None,
+        'rss_before_mb': best['rss_before_mb'],
+        'peak_rss_mb': max((r['peak_rss_mb'] or 0) for r in runs) or None,
+        'repeat': repeat,
+    }
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """Cases whose wall time grew by more than `tolerance` relative to the baseline."""
+    previous = {(r['stage'], r['size']): r for r in baseline.get('results', [])}
+    regressions = []
+    for result in results['results']:
+        old = previous.get((result['stage'], result['size']))
+        if (old and result['wall_s'] > old['wall_s'] * (1 + tolerance)
+                and result['wall_s'] - old['wall_s'] > MIN_SLOWDOWN_S):
+            regressions.append({**result, 'baseline_wall_s': old['wall_s'],
+                                'slowdown': result['wall_s'] / old['wall_s']})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmark with synthetic CMC data.")
+    parser.add_argument('--quick', action='store_true', help="smaller sizes for a fast check")
+    parser.add_argument('--stages', nargs='+', choices=sorted(STAGES), default=list(STAGES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default=RESULTS_FILE)
+    parser.add_argument('--baseline', default=BASELINE_FILE)
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE)
+    parser.add_argument('--save-baseline', action='store_true', help="store these results as the new baseline")
+    args = parser.parse_args()
+
+    sizes = {
+        'coins': QUICK_COIN_SIZES if args.quick else COIN_SIZES,
+        'history': QUICK_HISTORY_SIZES if args.quick else HISTORY_SIZES,
+    }
+    results = {
+        'created': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': [],
+    }
+    for stage in args.stages:
+        for size in sizes[STAGES[stage][1]]:
+            result = run_case(stage, size, args.repeat)
+            results['results'].append(result)
+            rate = f"{result['rows_per_s']:,.0f} rows/s" if result['rows_per_s'] else "-"
+            rss = f"{result['peak_rss_mb']:.0f} MB" if result['peak_rss_mb'] else "-"
+            print(f"{stage:<34} {size:>12,} {result['wall_s'] * 1000:>10.1f} ms {rate:>18} {rss:>8}")
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.save_baseline:
+        shutil.copyfile(args.output, args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; nothing compared. Create one with: "
+              f"python benchmarks/bench_pipeline.py{' --quick' if args.quick else ''} --save-baseline")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    known = {(r['stage'], r['size']) for r in baseline.get('results', [])}
+    compared = sum((r['stage'], r['size']) in known for r in results['results'])
+    print(f"Compared {compared} of {len(results['results'])} cases against {args.baseline} "
+          f"({baseline.get('platform', 'unknown platform')}, {baseline.get('created', '?')[:10]})")
+    regressions = compare(results, baseline, args.tolerance)
+    for r in regressions:
+        print(f"REGRESSION {r['stage']} @ {r['size']:,}: {r['wall_s'] * 1000:.1f} ms "
+              f"vs {r['baseline_wall_s'] * 1000:.1f} ms ({r['slowdown']:.2f}x)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,223 @@
+"""
+Local stand-in for the CoinMarketCap API (`/v1/cryptocurrency/listings/latest`).
+
+Serves synthetic payloads with evolving prices, or replays recorded payloads, with the
+same start/limit/convert semantics as the real endpoint. Latency, 429 rate limits,
+5xx errors and timeouts can be injected to reproduce outages offline.
+
+    python benchmarks/fake_cmc_server.py --port 8765 --coins 5000 --error-rate 0.05
+    CMC_BASE_URL=http://127.0.0.1:8765 python cleaning/data_cleaner_and_puller.py
+"""
+import argparse
+import glob
+import json
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from synthetic_cmc import SyntheticMarket
+
+LISTINGS_PATH = '/v1/cryptocurrency/listings/latest'
+MAX_LIMIT = 5000
+
+
+class Faults:
+    """
+    Fault injection settings. Each request first waits `latency` (+ up to `jitter`) seconds,
+    then fails with probability `timeout_rate` (hangs for `timeout_delay` seconds and drops
+    the connection), `rate_limit_rate` (429 with Retry-After) or `error_rate` (random 5xx).
+    `requests_per_minute` additionally enforces a real rate limit, like the Basic plan's 30/min.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, rate_limit_rate=0.0,
+                 timeout_rate=0.0, timeout_delay=30.0, retry_after=1, requests_per_minute=None, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.timeout_rate = timeout_rate
+        self.timeout_delay = timeout_delay
+        self.retry_after = retry_after
+        self.requests_per_minute = requests_per_minute
+        self.random = random.Random(seed)
+        self._window = []
+        self._lock = threading.Lock()
+
+    def over_rate_limit(self):
+        if not self.requests_per_minute:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            self._window = [t for t in self._window if now - t < 60]
+            if len(self._window) >= self.requests_per_minute:
+                return True
+            self._window.append(now)
+            return False
+
+    def pick(self):
+        """'timeout', 'rate_limit', 'error' or None for this request."""
+        with self._lock:
+            roll = self.random.random()
+        for fault, rate in (('timeout', self.timeout_rate), ('rate_limit', self.rate_limit_rate),
+                            ('error', self.error_rate)):
+            if roll < rate:
+                return fault
+            roll -= rate
+        return None
+
+
+class PayloadSource:
+    """
+    Full listings (all coins, ranked) for the current moment.
+    Synthetic mode advances the market every `step_seconds`; replay mode cycles through
+    recorded payload files (one full listings/latest response per file) at the same pace.
+    """
+
+    def __init__(self, coins=5000, seed=0, step_seconds=60.0, replay_files=None):
+        self.step_seconds = step_seconds
+        self.replay = [self._load(path) for path in replay_files or []]
+        self.market = None if self.replay else SyntheticMarket(coins, seed)
+        self.started = time.monotonic()
+        self.steps = 0
+        self._cache = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _load(path):
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def current(self):
+        with self._lock:
+            due = int((time.monotonic() - self.started) / self.step_seconds) if self.step_seconds else 0
+            if self.replay:
+                return self.replay[due % len(self.replay)]
+            while self.steps < due:
+                self.market.step()
+                self.steps += 1
+                self._cache = None
+            if self._cache is None:
+                self._cache = self.market.payload()
+            return self._cache
+
+
+def _status(error_code=0, error_message=None, credit_count=0, total_count=None):
+    return {
+        'timestamp': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z',
+        'error_code': error_code,
+        'error_message': error_message,
+        'elapsed': 10,
+        'credit_count': credit_count,
+        'notice': None,
+        **({'total_count': total_count} if total_count is not None else {}),
+    }
+
+
+def make_handler(source, faults, require_key=False):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, code, body, headers=None):
+            data = json.dumps(body).encode()
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _error(self, code, error_code, message, headers=None):
+            self._send(code, {'status': _status(error_code, message)}, headers)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != LISTINGS_PATH:
+                return self._error(404, 404, "Not found")
+
+            if faults.latency or faults.jitter:
+                time.sleep(faults.latency + faults.random.uniform(0, faults.jitter))
+            fault = faults.pick()
+            if fault == 'timeout':
+                time.sleep(faults.timeout_delay)
+                self.close_connection = True
+                return
+            if fault == 'rate_limit' or faults.over_rate_limit():
+                return self._error(429, 1008, "You've exceeded your API Key's HTTP request rate limit.",
+                                   {'Retry-After': str(faults.retry_after)})
+            if fault == 'error':
+                return self._error(faults.random.choice([500, 502, 503, 504]), 500, "Internal server error")
+
+            if require_key and not self.headers.get('X-CMC_PRO_API_KEY'):
+                return self._error(401, 1002, "API key missing.")
+
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            try:
+                start = int(query.get('start', 1))
+                limit = int(query.get('limit', 100))
+            except ValueError:
+                return self._error(400, 400, 'Invalid value for "start" or "limit"')
+            if start < 1 or not 1 <= limit <= MAX_LIMIT:
+                return self._error(400, 400, f'"limit" must be between 1 and {MAX_LIMIT}, "start" at least 1')
+            if query.get('convert', 'USD').upper() != 'USD':
+                return self._error(400, 400, 'Invalid value for "convert": only USD is available')
+
+            listings = source.current()
+            data = listings['data'][start - 1:start - 1 + limit]
+            self._send(200, {
+                'status': _status(credit_count=max(1, -(-len(data) // 200)), total_count=len(listings['data'])),
+                'data': data,
+            })
+
+    return Handler
+
+
+def serve(port=0, host='127.0.0.1', source=None, faults=None, require_key=False):
+    """Starts the server in a background thread and returns it (server.server_port has the port)."""
+    server = ThreadingHTTPServer((host, port), make_handler(source or PayloadSource(), faults or Faults(),
+                                                            require_key))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local CoinMarketCap listings/latest stand-in.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--coins', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--step-seconds', type=float, default=60.0, help="how often prices move")
+    parser.add_argument('--replay', nargs='*', default=[], help="recorded payload JSON files or globs")
+    parser.add_argument('--require-key', action='store_true')
+    parser.add_argument('--latency', type=float, default=0.0, help="base latency in seconds")
+    parser.add_argument('--jitter', type=float, default=0.0, help="extra random latency in seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="share of requests answered with 5xx")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="share answered with 429")
+    parser.add_argument('--timeout-rate', type=float, default=0.0, help="share that hang and drop")
+    parser.add_argument('--timeout-delay', type=float, default=30.0)
+    parser.add_argument('--retry-after', type=int, default=1)
+    parser.add_argument('--requests-per-minute', type=int, default=None)
+    args = parser.parse_args()
+
+    replay_files = sorted(path for pattern in args.replay for path in glob.glob(pattern))
+    source = PayloadSource(args.coins, args.seed, args.step_seconds, replay_files)
+    faults = Faults(args.latency, args.jitter, args.error_rate, args.rate_limit_rate, args.timeout_rate,
+                    args.timeout_delay, args.retry_after, args.requests_per_minute, args.seed)
+    server = serve(args.port, args.host, source, faults, args.require_key)
+    print(f"Serving {LISTINGS_PATH} on http://{args.host}:{server.server_port} "
+          f"({'replay of %d files' % len(replay_files) if replay_files else '%d synthetic coins' % args.coins})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Load test for the collector's fetch path against the local CoinMarketCap stand-in.
+
+Starts fake_cmc_server in-process with the requested faults, points fetch_data at it
+through CMC_BASE_URL and reports throughput and p50/p95/p99 cycle latency.
+
+    python benchmarks/load_collector.py --cycles 200 --limit 1000 --error-rate 0.05 --latency 0.05
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(ROOT, 'cleaning'))
+
+from fake_cmc_server import Faults, PayloadSource, serve
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else float('nan')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Collector load test against a local CMC stand-in.")
+    parser.add_argument('--cycles', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=1, help="collector cycles running at once")
+    parser.add_argument('--limit', type=int, default=100)
+    parser.add_argument('--coins', type=int, default=5000)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0)
+    parser.add_argument('--timeout-rate', type=float, default=0.0)
+    parser.add_argument('--timeout-delay', type=float, default=15.0)
+    args = parser.parse_args()
+
+    faults = Faults(args.latency, args.jitter, args.error_rate, args.rate_limit_rate,
+                    args.timeout_rate, args.timeout_delay, retry_after=0, seed=0)
+    server = serve(source=PayloadSource(args.coins, step_seconds=1.0), faults=faults)
+    os.environ['CMC_BASE_URL'] = f"http://127.0.0.1:{server.server_port}"
+    os.environ.setdefault('PIPELINE_METRICS_FILE', '')
+    from data_cleaner_and_puller import create_client, fetch_data
+
+    def cycle(client):
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            raw_data = fetch_data(limit=args.limit, client=client)
+        return time.perf_counter() - started, len(raw_data['data']) if raw_data else None
+
+    with create_client(api_key='local') as client:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            results = list(executor.map(lambda _: cycle(client), range(args.cycles)))
+        elapsed = time.perf_counter() - started
+        attempts = client.latency_summary()
+    server.shutdown()
+
+    latencies = [latency for latency, _ in results]
+    coins = [count for _, count in results if count is not None]
+    print(f"Cycles: {args.cycles} ({len(coins)} succeeded, {args.cycles - len(coins)} failed) in {elapsed:.2f}s")
+    print(f"Throughput: {args.cycles / elapsed:.1f} cycles/s, {sum(coins) / elapsed:,.0f} coins/s")
+    print("Cycle latency: " + ", ".join(
+        f"p{int(q * 100)} {percentile(latencies, q) * 1000:.1f} ms" for q in (0.5, 0.95, 0.99)
+    ) + f", max {max(latencies) * 1000:.1f} ms")
+    print(f"HTTP attempts: {attempts}")
+
+
+if __name__ == "__main__":
+    main()
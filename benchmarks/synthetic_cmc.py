@@ -0,0 +1,142 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+
+def _iso(ts):
+    # CoinMarketCap timestamps look like 2025-08-09T17:33:37.779Z
+    return ts.strftime('%Y-%m-%dT%H:%M:%S.') + f"{ts.microsecond // 1000:03d}Z"
+
+
+class SyntheticMarket:
+    """
+    Generates CoinMarketCap `listings/latest` payloads for `coins` fake coins.
+    Prices follow a seeded random walk, so consecutive snapshots evolve like the real API
+    and the same seed always produces the same payloads. Coins carry the same fields
+    (including the ones the pipeline ignores) so payload size matches production.
+    """
+
+    def __init__(self, coins=100, seed=0, start=None, interval=timedelta(minutes=6)):
+        self.random = random.Random(seed)
+        self.interval = interval
+        self.now = start or datetime(2025, 8, 9, 17, 30, tzinfo=timezone.utc)
+        self.coins = []
+        for index in range(coins):
+            supply = self.random.uniform(1e6, 1e10)
+            self.coins.append({
+                'id': index + 1,
+                'name': f"Coin {index + 1}",
+                'symbol': f"C{index + 1}",
+                'slug': f"coin-{index + 1}",
+                'circulating_supply': supply,
+                'total_supply': supply * self.random.uniform(1, 2),
+                'price': 10 ** self.random.uniform(-4, 5),
+                'volume_share': self.random.uniform(0.01, 0.3),
+                'history': [],
+            })
+
+    def step(self):
+        """Advances the market by one interval."""
+        self.now += self.interval
+        for coin in self.coins:
+            coin['history'].append(coin['price'])
+            del coin['history'][:-2016]
+            coin['price'] *= 1 + self.random.gauss(0, 0.004)
+
+    def _percent_change(self, coin, snapshots_back):
+        history = coin['history']
+        if not history:
+            return 0.0
+        past = history[-min(snapshots_back, len(history))]
+        return round((coin['price'] / past - 1) * 100, 8)
+
+    def payload(self, start=1, limit=None):
+        """One listings/latest response body (as a dict) for the ranks [start, start + limit)."""
+        ranked = sorted(self.coins, key=lambda c: c['price'] * c['circulating_supply'], reverse=True)
+        window = ranked[start - 1:start - 1 + limit] if limit else ranked[start - 1:]
+        per_hour = max(1, int(timedelta(hours=1) / self.interval))
+        total_cap = sum(c['price'] * c['circulating_supply'] for c in ranked)
+
+        data = []
+        for rank, coin in enumerate(window, start=start):
+            market_cap = coin['price'] * coin['circulating_supply']
+            data.append({
+                'id': coin['id'],
+                'name': coin['name'],
+                'symbol': coin['symbol'],
+                'slug': coin['slug'],
+                'num_market_pairs': 100,
+                'date_added': '2020-01-01T00:00:00.000Z',
+                'tags': ['mineable'],
+                'max_supply': None,
+                'circulating_supply': coin['circulating_supply'],
+                'total_supply': coin['total_supply'],
+                'infinite_supply': False,
+                'platform': None,
+                'cmc_rank': rank,
+                'self_reported_circulating_supply': None,
+                'self_reported_market_cap': None,
+                'tvl_ratio': None,
+                'last_updated': _iso(self.now),
+                'quote': {
+                    'USD': {
+                        'price': coin['price'],
+                        'volume_24h': market_cap * coin['volume_share'],
+                        'volume_change_24h': 0.0,
+                        'percent_change_1h': self._percent_change(coin, per_hour),
+                        'percent_change_24h': self._percent_change(coin, per_hour * 24),
+                        'percent_change_7d': self._percent_change(coin, per_hour * 24 * 7),
+                        'percent_change_30d': 0.0,
+                        'percent_change_60d': 0.0,
+                        'percent_change_90d': 0.0,
+                        'market_cap': market_cap,
+                        'market_cap_dominance': market_cap / total_cap * 100,
+                        'fully_diluted_market_cap': coin['price'] * coin['total_supply'],
+                        'tvl': None,
+                        'last_updated': _iso(self.now),
+                    }
+                }
+            })
+
+        return {
+            'status': {
+                'timestamp': _iso(self.now + timedelta(seconds=self.random.uniform(1, 90))),
+                'error_code': 0,
+                'error_message': None,
+                'elapsed': 10,
+                'credit_count': max(1, -(-len(data) // 200)),
+                'notice': None,
+                'total_count': len(self.coins),
+            },
+            'data': data,
+        }
+
+
+def synthetic_payload(coins=100, seed=0):
+    """A single listings/latest payload with `coins` coins."""
+    return SyntheticMarket(coins, seed).payload()
+
+
+def synthetic_history_rows(rows, coins=100, seed=0, start=None, interval=timedelta(minutes=6)):
+    """
+    Yields `rows` crypto_prices rows (snapshots of `coins` coins, oldest first) without
+    building API payloads, so multi-million-row fixtures can be generated quickly.
+    """
+    rng = random.Random(seed)
+    now = start or datetime(2024, 1, 1)
+    prices = [10 ** rng.uniform(-4, 5) for _ in range(coins)]
+    supplies = [rng.uniform(1e6, 1e10) for _ in range(coins)]
+    emitted = 0
+    while emitted < rows:
+        timestamp = now.isoformat()
+        last_updated = _iso(now.replace(tzinfo=timezone.utc))
+        for index in range(min(coins, rows - emitted)):
+            prices[index] *= 1 + rng.gauss(0, 0.004)
+            market_cap = prices[index] * supplies[index]
+            yield (
+                index + 1, f"Coin {index + 1}", f"C{index + 1}", f"coin-{index + 1}", index + 1,
+                prices[index], market_cap * 0.05, market_cap,
+                rng.gauss(0, 0.5), rng.gauss(0, 2), rng.gauss(0, 5),
+                last_updated, timestamp,
+            )
+        emitted += coins
+        now += interval
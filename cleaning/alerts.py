@@ -0,0 +1,188 @@
+import json
+import math
+import os
+
+from metrics import stage
+
+# File state default (statistik EWMA per koin) dan file alert (JSON Lines) yang dibaca dashboard
+STATE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'alert_state.json')
+ALERTS_FILE = os.getenv(
+    'PIPELINE_ALERTS_FILE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'alerts.jsonl')
+)
+
+# Half-life EWMA dalam jumlah snapshot: bobot snapshot lama tinggal setengah setelah sekian snapshot
+HALFLIFE = 30
+# Jumlah snapshot minimal per koin sebelum z-score dipakai (statistik awal belum stabil)
+MIN_PERIODS = 30
+# Ambang z-score return harga (naik atau turun) dan log volume (hanya naik)
+PRICE_Z_THRESHOLD = 4.0
+VOLUME_Z_THRESHOLD = 4.0
+# Lonjakan volume juga harus minimal sekian kali rata-rata EWMA-nya
+VOLUME_SURGE_RATIO = 3.0
+# Riwayat rank yang disimpan per koin, dan lompatan minimal (absolut dan relatif terhadap rank lama)
+RANK_WINDOW = 10
+RANK_JUMP = 10
+RANK_JUMP_RATIO = 0.2
+
+# Indeks field di state satu koin
+LAST_PRICE, RETURN_COUNT, RETURN_MEAN, RETURN_VAR, VOLUME_COUNT, VOLUME_MEAN, VOLUME_VAR, RANKS = range(8)
+
+
+# Fungsi untuk memperbarui rata-rata dan varians EWMA satu nilai (O(1))
+def ewma_update(mean, var, count, value, alpha):
+    """
+    Mengembalikan (mean, var) baru setelah nilai ke-`count` masuk. Selama count < 1/alpha
+    bobotnya 1/count (rata-rata biasa), sehingga varians awal tidak bias ke nol.
+    """
+    weight = max(alpha, 1 / count)
+    diff = value - mean
+    increment = weight * diff
+    return mean + increment, (1 - weight) * (var + diff * increment)
+
+
+def _zscore(value, mean, var):
+    return (value - mean) / math.sqrt(var) if var > 0 else 0.0
+
+
+# Kelas untuk mendeteksi anomali dari setiap snapshot baru
+class AnomalyDetector:
+    """
+    Menyimpan state bergulir per id koin: harga terakhir, EWMA mean/varians dari log return
+    harga dan log volume 24h, serta riwayat rank terakhir. Setiap snapshot diproses dalam
+    O(1) per koin tanpa membaca history, dan menghasilkan alert:
+    - price_spike: |z-score| log return harga >= PRICE_Z_THRESHOLD;
+    - volume_surge: z-score log volume >= VOLUME_Z_THRESHOLD dan volume >= VOLUME_SURGE_RATIO x rata-rata;
+    - rank_jump: rank bergeser minimal RANK_JUMP (dan RANK_JUMP_RATIO dari rank lama) dalam RANK_WINDOW snapshot.
+    State baru hanya ditulis ke disk lewat commit(), seperti SnapshotDeduper.
+    """
+
+    def __init__(self, state_path=STATE_FILE, halflife=HALFLIFE):
+        self.state_path = state_path
+        self.alpha = 1 - 0.5 ** (1 / halflife)
+        self.coins = {}
+        self.last_timestamp = None
+        try:
+            with open(state_path) as f:
+                state = json.load(f)
+            self.coins = state['coins']
+            self.last_timestamp = state['last_timestamp']
+        except (OSError, ValueError, KeyError):
+            # State belum ada atau rusak: statistik dimulai dari awal
+            self.coins = {}
+
+    def update(self, columns):
+        """
+        Memasukkan satu snapshot (kolom dari clean_and_format_data(..., as_frame=False)) dan
+        mengembalikan list alert (dict). Snapshot yang tidak lebih baru dari snapshot terakhir
+        (misalnya diputar ulang setelah restart) dilewati.
+        """
+        if not columns.get('id'):
+            return []
+        timestamp = columns['pull_timestamp'][0]
+        # Timestamp ISO dari API berformat sama, sehingga bisa dibandingkan sebagai string
+        if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+            return []
+
+        with stage('detect_anomalies', rows=len(columns['id'])) as record:
+            alerts = []
+            alpha = self.alpha
+            for coin_id, name, symbol, rank, price, volume in zip(
+                    columns['id'], columns['name'], columns['symbol'], columns['cmc_rank'],
+                    columns['price'], columns['volume_24h']):
+                key = str(coin_id)
+                state = self.coins.get(key)
+                if state is None:
+                    state = self.coins[key] = [None, 0, 0.0, 0.0, 0, 0.0, 0.0, []]
+
+                found = []
+                if price == price and price > 0:
+                    if state[LAST_PRICE]:
+                        log_return = math.log(price / state[LAST_PRICE])
+                        z = _zscore(log_return, state[RETURN_MEAN], state[RETURN_VAR])
+                        if state[RETURN_COUNT] >= MIN_PERIODS and abs(z) >= PRICE_Z_THRESHOLD:
+                            found.append(('price_spike', z, (math.exp(log_return) - 1) * 100))
+                        state[RETURN_COUNT] += 1
+                        state[RETURN_MEAN], state[RETURN_VAR] = ewma_update(
+                            state[RETURN_MEAN], state[RETURN_VAR], state[RETURN_COUNT], log_return, alpha)
+                    state[LAST_PRICE] = price
+
+                if volume == volume and volume > 0:
+                    log_volume = math.log(volume)
+                    if state[VOLUME_COUNT] >= MIN_PERIODS:
+                        z = _zscore(log_volume, state[VOLUME_MEAN], state[VOLUME_VAR])
+                        ratio = math.exp(log_volume - state[VOLUME_MEAN])
+                        if z >= VOLUME_Z_THRESHOLD and ratio >= VOLUME_SURGE_RATIO:
+                            found.append(('volume_surge', z, ratio))
+                    state[VOLUME_COUNT] += 1
+                    state[VOLUME_MEAN], state[VOLUME_VAR] = ewma_update(
+                        state[VOLUME_MEAN], state[VOLUME_VAR], state[VOLUME_COUNT], log_volume, alpha)
+
+                if rank is not None:
+                    ranks = state[RANKS]
+                    if ranks:
+                        jump = ranks[0] - rank
+                        if abs(jump) >= max(RANK_JUMP, RANK_JUMP_RATIO * ranks[0]):
+                            found.append(('rank_jump', None, jump))
+                            # Lompatan yang sama tidak dilaporkan ulang pada snapshot berikutnya
+                            ranks.clear()
+                    ranks.append(rank)
+                    del ranks[:-RANK_WINDOW]
+
+                for kind, z, change in found:
+                    alerts.append({
+                        'timestamp': timestamp, 'kind': kind, 'id': coin_id, 'name': name,
+                        'symbol': symbol, 'cmc_rank': rank, 'price': price, 'volume_24h': volume,
+                        'z': None if z is None else round(z, 2), 'change': round(change, 4),
+                    })
+
+            self.last_timestamp = timestamp
+            record['alerts'] = len(alerts)
+        return alerts
+
+    def commit(self):
+        """Menyimpan state semua koin ke file state (ditulis atomik)."""
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'last_timestamp': self.last_timestamp, 'coins': self.coins}, f, separators=(',', ':'))
+        os.replace(tmp_path, self.state_path)
+
+
+# Fungsi untuk menambahkan alert ke file JSON Lines
+def write_alerts(alerts, path=ALERTS_FILE):
+    """Menambahkan alert ke file alert (satu baris JSON per alert)."""
+    if not alerts or not path:
+        return
+    with open(path, 'a', encoding='utf-8') as f:
+        f.writelines(json.dumps(alert) + '\n' for alert in alerts)
+
+
+# Fungsi untuk membaca alert terbaru tanpa membaca seluruh file
+def read_alerts(path=ALERTS_FILE, limit=50, chunk_size=1 << 16):
+    """Mengembalikan maksimal `limit` alert terakhir (terbaru dulu) dengan membaca file dari belakang."""
+    try:
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            data = b''
+            while position > 0 and data.count(b'\n') <= limit:
+                step = min(chunk_size, position)
+                position -= step
+                f.seek(position)
+                data = f.read(step) + data
+    except FileNotFoundError:
+        return []
+
+    lines = data.splitlines()
+    if position > 0:
+        # Baris pertama mungkin terpotong di tengah
+        lines = lines[1:]
+    alerts = []
+    for line in reversed(lines):
+        try:
+            alerts.append(json.loads(line))
+        except ValueError:
+            continue
+        if len(alerts) >= limit:
+            break
+    return alerts
@@ -0,0 +1,197 @@
+import argparse
+import asyncio
+import math
+import os
+import random
+import signal
+import time
+from datetime import datetime, timezone
+
+from data_cleaner_and_puller import (
+    MAX_WORKERS, append_to_history, clean_and_format_data, create_client, fetch_data, save_updated_data
+)
+from alerts import AnomalyDetector, write_alerts
+from snapshot_dedupe import SnapshotDeduper
+
+# --- Konfigurasi default collector resident ---
+# Kredit harian CMC yang boleh dipakai (paket Basic: 10.000 kredit/bulan ~ 333 kredit/hari)
+DAILY_CREDITS = int(os.getenv('CMC_DAILY_CREDITS', '333'))
+# Interval terpendek antar polling per endpoint (detik)
+MIN_INTERVAL = 5.0
+# Jitter acak maksimal (detik) yang ditambahkan ke setiap tick
+JITTER = 1.0
+
+# Kelas untuk mengatur anggaran kredit API CoinMarketCap
+class CreditBudget:
+    """
+    Anggaran kredit harian (UTC) yang dibagi ke beberapa endpoint berdasarkan `share`.
+    Interval polling dihitung ulang setiap tick dari sisa kredit dan sisa waktu hari itu,
+    sehingga pemakaian berlebih otomatis memperlambat polling dan sisa kredit mempercepatnya.
+    """
+
+    def __init__(self, daily_credits=DAILY_CREDITS):
+        self.daily_credits = daily_credits
+        self.day = None
+        self.spent = 0.0
+
+    def _roll_day(self):
+        today = datetime.now(timezone.utc).date()
+        if today != self.day:
+            self.day = today
+            self.spent = 0.0
+
+    def record(self, credits):
+        """Mencatat kredit yang dipakai oleh satu request."""
+        self._roll_day()
+        self.spent += credits
+
+    def interval_for(self, credits_per_call, share=1.0, min_interval=MIN_INTERVAL):
+        """Interval (detik) agar endpoint ini tidak melebihi bagiannya dari sisa kredit hari ini."""
+        self._roll_day()
+        now = datetime.now(timezone.utc)
+        seconds_left = 86400 - (now.hour * 3600 + now.minute * 60 + now.second)
+        credits_left = self.daily_credits - self.spent
+        if credits_left <= 0:
+            # Kredit hari ini habis: tunggu sampai pergantian hari (UTC)
+            return max(seconds_left, min_interval)
+        calls_left = credits_left * share / credits_per_call
+        return max(seconds_left / calls_left, min_interval)
+
+
+# Kelas untuk satu endpoint yang dipolling secara berkala
+class Endpoint:
+    """
+    Endpoint yang dipolling: `fetch(client)` mengembalikan payload API,
+    `credits_per_call` adalah perkiraan awal yang diperbarui dari status.credit_count.
+    """
+
+    def __init__(self, name, fetch, credits_per_call, share=1.0):
+        self.name = name
+        self.fetch = fetch
+        self.credits_per_call = credits_per_call
+        self.share = share
+
+
+def listings_endpoint(limit):
+    """Endpoint listings/latest untuk `limit` koin teratas (1 kredit per 200 koin)."""
+    return Endpoint(
+        'listings',
+        lambda client: fetch_data(limit=limit, client=client),
+        credits_per_call=math.ceil(limit / 200),
+    )
+
+
+# Fungsi untuk menyimpan snapshot (dijalankan di thread terpisah oleh writer)
+def write_snapshot(raw_data, deduper, detector=None):
+    """
+    Menyimpan snapshot; koin yang tidak berubah tidak ditambahkan ke history.
+    State dedupe hanya disimpan jika CSV dan history sama-sama berhasil ditulis.
+    Jika `detector` diberikan, snapshot juga diperiksa untuk anomali dan alert-nya disimpan.
+    """
+    changed_data = deduper.filter_changed(raw_data)
+    if not changed_data['data']:
+        return
+    cleaned_columns = clean_and_format_data(raw_data, as_frame=False)
+    if cleaned_columns.get('id'):
+        saved = save_updated_data(cleaned_columns)
+        saved = append_to_history(clean_and_format_data(changed_data, as_frame=False)) and saved
+        if saved:
+            deduper.commit()
+        if detector is not None:
+            write_alerts(detector.update(cleaned_columns))
+            detector.commit()
+
+
+async def writer(queue):
+    """Menulis snapshot dari antrean satu per satu, sampai menerima None."""
+    deduper = SnapshotDeduper()
+    detector = AnomalyDetector()
+    while True:
+        raw_data = await queue.get()
+        try:
+            if raw_data is None:
+                return
+            await asyncio.to_thread(write_snapshot, raw_data, deduper, detector)
+        except Exception as e:
+            print(f"Gagal menyimpan snapshot: {e}")
+        finally:
+            queue.task_done()
+
+
+async def poll(endpoint, client, budget, queue, stop, jitter=JITTER, min_interval=MIN_INTERVAL):
+    """
+    Memanggil endpoint secara berkala. Jadwal tick dihitung dari jadwal sebelumnya
+    (bukan dari waktu selesai request), sehingga durasi request tidak menimbulkan drift.
+    """
+    loop = asyncio.get_running_loop()
+    next_tick = loop.time()
+    while not stop.is_set():
+        started = time.perf_counter()
+        raw_data = await asyncio.to_thread(endpoint.fetch, client)
+        if raw_data:
+            credits = raw_data['status'].get('credit_count') or endpoint.credits_per_call
+            endpoint.credits_per_call = credits
+            budget.record(credits)
+            await queue.put(raw_data)
+            print(f"[{endpoint.name}] {len(raw_data['data'])} koin dalam "
+                  f"{time.perf_counter() - started:.2f} detik, kredit hari ini: {budget.spent:.0f}")
+
+        interval = budget.interval_for(endpoint.credits_per_call, endpoint.share, min_interval)
+        next_tick += interval
+        # Tick yang terlewat (misalnya setelah request lambat) tidak dikejar satu per satu
+        if next_tick < loop.time():
+            next_tick = loop.time()
+        delay = next_tick - loop.time() + random.uniform(0, jitter)
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run(endpoints, daily_credits=DAILY_CREDITS, jitter=JITTER, min_interval=MIN_INTERVAL):
+    """Menjalankan semua endpoint sampai SIGINT/SIGTERM, lalu menyelesaikan tulisan yang tertunda."""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            # Windows tidak mendukung add_signal_handler; Ctrl+C tetap menghentikan lewat KeyboardInterrupt
+            pass
+
+    budget = CreditBudget(daily_credits)
+    queue = asyncio.Queue()
+    writer_task = asyncio.create_task(writer(queue))
+
+    with create_client(max_workers=MAX_WORKERS) as client:
+        pollers = [
+            asyncio.create_task(poll(endpoint, client, budget, queue, stop, jitter, min_interval))
+            for endpoint in endpoints
+        ]
+        try:
+            await asyncio.gather(*pollers)
+        finally:
+            stop.set()
+            print("Menghentikan collector, menyimpan data yang tertunda...")
+            await queue.put(None)
+            await writer_task
+    print("Collector berhenti.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Collector CoinMarketCap yang berjalan terus-menerus.")
+    parser.add_argument('--limit', type=int, default=int(os.getenv('CMC_COIN_LIMIT', '100')))
+    parser.add_argument('--daily-credits', type=int, default=DAILY_CREDITS)
+    parser.add_argument('--min-interval', type=float, default=MIN_INTERVAL)
+    parser.add_argument('--jitter', type=float, default=JITTER)
+    args = parser.parse_args()
+
+    print("Memulai collector resident...")
+    asyncio.run(run(
+        [listings_endpoint(args.limit)],
+        daily_credits=args.daily_credits, jitter=args.jitter, min_interval=args.min_interval
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,95 +1,317 @@
-import pandas as pd
-import requests
-import json
+import csv
 import os
-from datetime import datetime
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from math import nan as NAN
 
-# Fungsi untuk mengambil data dari API CoinMarketCap
-def fetch_data(limit=100):
-    """Mengambil data cryptocurrency dari API CoinMarketCap."""
-    url = 'https://pro-api.coinmarketcap.com/v1/cryptocurrency/listings/latest'
-    parameters = {
-        'start': '1',
-        'limit': str(limit),  # Menggunakan parameter limit
-        'convert': 'USD'
-    }
+import requests
+
+# numpy, pandas, dan history_store (pyarrow) diimpor di dalam fungsi yang membutuhkannya,
+# sehingga jalur collector (ambil API -> CSV) hanya memuat library standar dan requests
+from http_client import CircuitBreaker, HttpClient
+from metrics import record_http_attempt, stage
+from snapshot_dedupe import SnapshotDeduper
+
+# Base URL API, bisa diarahkan ke server tiruan lokal (benchmarks/fake_cmc_server.py) lewat CMC_BASE_URL
+CMC_BASE_URL = os.getenv('CMC_BASE_URL', 'https://pro-api.coinmarketcap.com')
+API_URL = CMC_BASE_URL.rstrip('/') + '/v1/cryptocurrency/listings/latest'
+# Jumlah koin per halaman request (CMC menghitung 1 kredit per 200 koin)
+PAGE_SIZE = 200
+# Batas jumlah request yang berjalan bersamaan
+MAX_WORKERS = 4
+# Circuit breaker bersama untuk semua request ke CMC dalam proses ini
+CMC_BREAKER = CircuitBreaker()
+
+# Fungsi untuk membagi rentang koin menjadi beberapa jendela start/limit
+def build_page_windows(limit, page_size=PAGE_SIZE, start=1):
+    """Membagi rentang peringkat [start, start + limit) menjadi pasangan (start, limit) per halaman."""
+    windows = []
+    end = start + limit
+    while start < end:
+        size = min(page_size, end - start)
+        windows.append((start, size))
+        start += size
+    return windows
+
+# Fungsi untuk membuat satu client HTTP keep-alive yang dipakai bersama oleh semua halaman
+def create_client(api_key=None, max_workers=MAX_WORKERS):
+    """
+    Membuat HttpClient dengan pool koneksi sebesar jumlah worker, timeout connect/read,
+    retry dengan backoff, dan circuit breaker bersama (CMC_BREAKER).
+    Setiap percobaan request dicatat ke file metrik.
+    """
     headers = {
         'Accepts': 'application/json',
         # Menggunakan os.getenv untuk mengambil kunci API dari environment variable
-        'X-CMC_PRO_API_KEY': os.getenv('CMC_PRO_API_KEY'),
+        'X-CMC_PRO_API_KEY': api_key or os.getenv('CMC_PRO_API_KEY'),
     }
+    return HttpClient(headers=headers, pool_size=max_workers, breaker=CMC_BREAKER,
+                      on_attempt=record_http_attempt)
 
-    try:
-        response = requests.get(url, headers=headers, params=parameters)
-        response.raise_for_status() # Menimbulkan error untuk kode status HTTP yang buruk
-        return response.json()
-    except requests.exceptions.HTTPError as e:
-        print(f"HTTP Error: {e}")
-        print(f"Response content: {response.text}")
-        return None
-    except requests.exceptions.RequestException as e:
-        print(f"Request Error: {e}")
-        return None
+# Fungsi untuk mengambil satu halaman data
+def fetch_page(client, start, limit, attempts=None):
+    """
+    Mengambil satu halaman listings/latest mulai dari peringkat `start`.
+    Catatan percobaan request ditambahkan ke `attempts` (list) jika diberikan.
+    """
+    parameters = {
+        'start': str(start),
+        'limit': str(limit),
+        'convert': 'USD'
+    }
+    response = client.get(API_URL, params=parameters, attempts=attempts)
+    with stage('json_decode', bytes=len(response.content)) as record:
+        page = response.json()
+        record['rows'] = len(page.get('data', []))
+    return page
+
+# Fungsi untuk menggabungkan beberapa halaman menjadi satu payload
+def merge_pages(pages):
+    """
+    Menggabungkan halaman-halaman API menjadi satu payload dengan bentuk yang sama
+    seperti respons tunggal, sehingga bisa langsung dipakai clean_and_format_data.
+    """
+    status = dict(pages[0]['status'])
+    status['credit_count'] = sum(page['status'].get('credit_count', 0) for page in pages)
+
+    # Peringkat bisa bergeser di antara request, jadi koin duplikat di batas halaman dibuang
+    data = []
+    seen_ids = set()
+    for page in pages:
+        for coin in page.get('data', []):
+            if coin['id'] in seen_ids:
+                continue
+            seen_ids.add(coin['id'])
+            data.append(coin)
+
+    return {'status': status, 'data': data}
+
+def _fetch_pages(client, windows, workers, attempts=None):
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(lambda window: fetch_page(client, *window, attempts=attempts), windows))
+
+# Fungsi untuk mengambil data dari API CoinMarketCap
+def fetch_data(limit=100, page_size=PAGE_SIZE, max_workers=MAX_WORKERS, api_key=None, client=None):
+    """
+    Mengambil data cryptocurrency dari API CoinMarketCap.
+    Rentang `limit` koin dibagi per halaman dan diambil secara paralel
+    (maksimal `max_workers` request sekaligus) melalui satu client.
+    Proses yang berjalan lama bisa memberikan `client` sendiri agar koneksinya tetap hangat.
+    """
+    windows = build_page_windows(limit, page_size)
+    workers = max(1, min(max_workers, len(windows)))
+    own_client = client is None
+    if own_client:
+        client = create_client(api_key, workers)
+    # Percobaan milik panggilan ini saja (client yang dipakai bersama juga dipakai siklus lain)
+    attempts = []
+
+    with stage('fetch_data', pages=len(windows)) as record:
+        try:
+            raw_data = merge_pages(_fetch_pages(client, windows, workers, attempts))
+            record['rows'] = len(raw_data['data'])
+            return raw_data
+        except requests.exceptions.HTTPError as e:
+            record.update(ok=False, error='HTTPError')
+            print(f"HTTP Error: {e}")
+            print(f"Response content: {e.response.text if e.response is not None else ''}")
+            return None
+        except requests.exceptions.RequestException as e:
+            record.update(ok=False, error=type(e).__name__)
+            print(f"Request Error: {e}")
+            return None
+        finally:
+            record['http_status'] = attempts[-1]['status'] if attempts else None
+            record['retries'] = sum(1 for attempt in attempts if attempt['attempt'] > 0)
+            record['bytes'] = sum(attempt['bytes'] or 0 for attempt in attempts)
+            if own_client:
+                print(f"Latensi API: {client.latency_summary()}")
+                client.close()
+
+# Field atribut koin dan field quote USD yang dipakai dari payload API
+COIN_FIELDS = ['id', 'name', 'symbol', 'slug', 'cmc_rank']
+QUOTE_FIELDS = [
+    'price', 'volume_24h', 'market_cap',
+    'percent_change_1h', 'percent_change_24h', 'percent_change_7d'
+]
+
+# Fungsi untuk mengekstrak hanya field yang dibutuhkan menjadi kolom bertipe
+def extract_columns(raw_data):
+    """
+    Mengambil 12 field yang dibutuhkan langsung dari payload menjadi kolom
+    (dict nama kolom -> list/array), tanpa pandas dan tanpa meratakan field lain.
+    Field quote disimpan sebagai array float64 ('d'); timestamp tetap string ISO.
+    """
+    coins = raw_data['data']
+    columns = {field: [coin.get(field) for coin in coins] for field in COIN_FIELDS}
+
+    quotes = [coin.get('quote', {}).get('USD', {}) for coin in coins]
+    for field in QUOTE_FIELDS:
+        values = (quote.get(field) for quote in quotes)
+        columns[field] = array('d', (NAN if value is None else value for value in values))
+
+    columns['last_updated'] = [quote.get('last_updated') for quote in quotes]
+    columns['pull_timestamp'] = [raw_data['status']['timestamp']] * len(coins)
+    return columns
 
 # Fungsi untuk membersihkan dan memformat data
-def clean_and_format_data(raw_data):
+def clean_and_format_data(raw_data, as_frame=True):
     """
     Membersihkan dan memformat data JSON mentah menjadi DataFrame.
+    Jika as_frame=False, pandas dilewati dan hasilnya berupa kolom dari extract_columns
+    (untuk penulis storage, baris bisa didapat dengan zip(*columns.values())).
     """
     if not raw_data or 'data' not in raw_data:
         print("Error: 'data' key not found in raw_data.")
-        return pd.DataFrame()
-
-    df = pd.json_normalize(raw_data['data'])
-    pull_timestamp = raw_data['status']['timestamp']
-
-    df_cleaned = df[[
-        'id', 'name', 'symbol', 'slug', 'cmc_rank',
-        'quote.USD.price', 'quote.USD.volume_24h',
-        'quote.USD.market_cap', 'quote.USD.percent_change_1h',
-        'quote.USD.percent_change_24h', 'quote.USD.percent_change_7d',
-        'quote.USD.last_updated'
-    ]].copy()
-
-    df_cleaned.columns = [
-        'id', 'name', 'symbol', 'slug', 'cmc_rank',
-        'price', 'volume_24h', 'market_cap',
-        'percent_change_1h', 'percent_change_24h',
-        'percent_change_7d', 'last_updated'
-    ]
-
-    df_cleaned['pull_timestamp'] = pull_timestamp
-    df_cleaned['last_updated'] = pd.to_datetime(df_cleaned['last_updated'])
-    df_cleaned['pull_timestamp'] = pd.to_datetime(df_cleaned['pull_timestamp'])
+        if as_frame:
+            import pandas as pd
+            return pd.DataFrame()
+        return {}
+
+    with stage('clean_and_format_data', rows=len(raw_data['data']), as_frame=as_frame):
+        columns = extract_columns(raw_data)
+        if not as_frame:
+            return columns
+
+        import numpy as np
+        import pandas as pd
+
+        # Setiap kolom timestamp dikonversi sekali secara vektor, bukan per elemen
+        df_cleaned = pd.DataFrame({
+            **{field: columns[field] for field in COIN_FIELDS},
+            **{field: np.frombuffer(columns[field], dtype=np.float64) for field in QUOTE_FIELDS},
+            'last_updated': pd.to_datetime(columns['last_updated']),
+            'pull_timestamp': pd.to_datetime(columns['pull_timestamp']),
+        })
 
     return df_cleaned
 
+# Fungsi untuk memformat nilai kolom persis seperti DataFrame.to_csv
+def _format_int_column(values):
+    # Kolom bilangan bulat dengan nilai kosong menjadi float64 di pandas (1 -> "1.0")
+    if all(isinstance(value, int) for value in values):
+        return [str(value) for value in values]
+    return ['' if value is None else repr(float(value)) for value in values]
+
+def _format_float_column(values):
+    # repr() menghasilkan representasi terpendek yang sama dengan pandas; NaN ditulis kosong
+    return ['' if value != value else repr(value) for value in values]
+
+def _format_timestamp_column(values):
+    # Sama dengan pd.to_datetime(...) lalu to_csv: "2025-08-09 17:32:00+00:00",
+    # dan mikrodetik hanya ditulis jika tidak nol ("2025-08-09 17:33:37.779000+00:00")
+    formatted = []
+    for value in values:
+        if not value:
+            formatted.append('')
+            continue
+        timestamp = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.astimezone(timezone.utc)
+        formatted.append(timestamp.isoformat(sep=' '))
+    return formatted
+
+def format_csv_columns(columns):
+    """
+    Memformat kolom dari extract_columns menjadi teks, byte demi byte sama dengan
+    clean_and_format_data(...).to_csv(index=False), tanpa pandas.
+    """
+    formatted = {}
+    for field in COIN_FIELDS:
+        if field in ('id', 'cmc_rank'):
+            formatted[field] = _format_int_column(columns[field])
+        else:
+            formatted[field] = ['' if value is None else value for value in columns[field]]
+    for field in QUOTE_FIELDS:
+        formatted[field] = _format_float_column(columns[field])
+    formatted['last_updated'] = _format_timestamp_column(columns['last_updated'])
+    formatted['pull_timestamp'] = _format_timestamp_column(columns['pull_timestamp'])
+    return formatted
+
+def write_columns_csv(columns, file_path):
+    """Menulis kolom dari extract_columns ke CSV dengan modul csv (format sama dengan pandas)."""
+    formatted = format_csv_columns(columns)
+    # pandas memakai csv.writer dengan QUOTE_MINIMAL dan os.linesep sebagai akhir baris
+    with open(file_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, lineterminator=os.linesep)
+        writer.writerow(formatted.keys())
+        writer.writerows(zip(*formatted.values()))
+
 # Fungsi untuk menyimpan data, mode overwrite
 def save_updated_data(df, file_path='cleaning/updated_file.csv'):
     """
-    Menyimpan DataFrame ke file CSV dengan menimpa (overwrite) file yang sudah ada.
+    Menyimpan data ke file CSV dengan menimpa (overwrite) file yang sudah ada.
+    `df` berupa DataFrame, atau kolom dari clean_and_format_data(as_frame=False)
+    yang ditulis tanpa pandas dengan hasil file yang identik.
+    Mengembalikan True jika file berhasil ditulis, False jika gagal (error hanya dicetak).
+    """
+    rows = len(df['id']) if isinstance(df, dict) else len(df)
+    with stage('save_updated_data', rows=rows) as record:
+        try:
+            if isinstance(df, dict):
+                write_columns_csv(df, file_path)
+            else:
+                df.to_csv(file_path, index=False)
+            record['bytes'] = os.path.getsize(file_path)
+            print(f"Data {rows} koin teratas berhasil disimpan ke {file_path}")
+            return True
+        except Exception as e:
+            record.update(ok=False, error=type(e).__name__)
+            print(f"Gagal menyimpan data ke CSV: {e}")
+            return False
+
+# Fungsi untuk menambahkan snapshot ke history Parquet yang dipartisi per tanggal
+def append_to_history(df):
+    """
+    Menyimpan snapshot (DataFrame atau kolom dari extract_columns) ke history store
+    (cleaning/history). Dilewati dengan peringatan jika pyarrow belum terinstall,
+    agar pembaruan updated_file.csv tetap berjalan.
+    Mengembalikan True jika snapshot tersimpan, False jika dilewati.
     """
     try:
-        df.to_csv(file_path, index=False)
-        print(f"Data 100 koin teratas berhasil disimpan ke {file_path}")
-    except Exception as e:
-        print(f"Gagal menyimpan data ke CSV: {e}")
+        import history_store
+        if isinstance(df, dict):
+            file_path = history_store.write_columns(df)
+        else:
+            file_path = history_store.write_snapshot(df)
+        print(f"Snapshot history berhasil disimpan ke {file_path}")
+        return True
+    except ImportError as e:
+        print(f"Peringatan: History tidak disimpan. {e}")
+        return False
 
 if __name__ == "__main__":
     print("Memulai proses pengambilan dan pembersihan data updated_file...")
     
-    # Ambil 100 koin teratas saja
-    raw_data = fetch_data(limit=100)
+    # Jumlah koin teratas yang diambil, default 100 (bisa diubah lewat CMC_COIN_LIMIT)
+    raw_data = fetch_data(limit=int(os.getenv('CMC_COIN_LIMIT', '100')))
     
     if raw_data:
         print(f"Data berhasil didapat dari API. Jumlah koin: {len(raw_data['data'])}")
-        cleaned_df = clean_and_format_data(raw_data)
-        
-        if not cleaned_df.empty:
-            # Simpan data ke updated_file.csv (akan menimpa file yang lama)
-            save_updated_data(cleaned_df)
-            print("Proses selesai.")
+
+        # Hanya koin yang datanya berubah sejak penyimpanan terakhir yang diteruskan ke storage
+        deduper = SnapshotDeduper()
+        changed_data = deduper.filter_changed(raw_data)
+        if not changed_data['data']:
+            print("Tidak ada data yang berubah sejak snapshot terakhir. Penyimpanan dilewati.")
         else:
-            print("Gagal membersihkan data.")
+            print(f"Jumlah koin yang berubah: {len(changed_data['data'])}")
+            # Kolom tanpa pandas: file yang ditulis sama persis dengan versi DataFrame
+            cleaned_columns = clean_and_format_data(raw_data, as_frame=False)
+            
+            if cleaned_columns.get('id'):
+                # Simpan data ke updated_file.csv (akan menimpa file yang lama)
+                saved = save_updated_data(cleaned_columns)
+                saved = append_to_history(clean_and_format_data(changed_data, as_frame=False)) and saved
+                # State dedupe hanya disimpan jika semua penyimpanan berhasil; jika tidak, koin
+                # yang sama akan dianggap berubah lagi dan ditulis ulang pada run berikutnya
+                if saved:
+                    deduper.commit()
+                    print("Proses selesai.")
+                else:
+                    print("Proses selesai dengan kegagalan penyimpanan; state dedupe tidak diperbarui.")
+            else:
+                print("Gagal membersihkan data.")
     else:
         print("Gagal mengambil data dari API.")
@@ -0,0 +1,198 @@
+import os
+import glob
+from datetime import datetime, timezone
+
+# pyarrow bersifat opsional: hanya dibutuhkan untuk menulis/membaca history Parquet
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# pandas hanya diimpor oleh fungsi baca/pemadatan; menulis snapshot dari kolom (write_columns)
+# cukup dengan pyarrow sehingga collector tidak perlu memuat pandas
+
+# Skema tetap untuk setiap file snapshot, apa pun versi pandas/jalur penulisnya,
+# agar file-file dalam satu partisi selalu bisa digabung oleh compact_partition
+SNAPSHOT_SCHEMA = pa.schema([
+    ('id', pa.int64()),
+    ('name', pa.string()),
+    ('symbol', pa.string()),
+    ('slug', pa.string()),
+    ('cmc_rank', pa.int64()),
+    ('price', pa.float64()),
+    ('volume_24h', pa.float64()),
+    ('market_cap', pa.float64()),
+    ('percent_change_1h', pa.float64()),
+    ('percent_change_24h', pa.float64()),
+    ('percent_change_7d', pa.float64()),
+    ('last_updated', pa.timestamp('us', tz='UTC')),
+    ('pull_timestamp', pa.timestamp('us', tz='UTC')),
+]) if pa is not None else None
+
+# Folder default history, dipartisi per tanggal: history/date=YYYY-MM-DD/*.parquet
+HISTORY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'history')
+DAILY_FILE = 'daily.parquet'
+
+# Fungsi untuk memastikan pyarrow tersedia
+def _require_pyarrow():
+    if pq is None:
+        raise ImportError("pyarrow diperlukan untuk history store. Install dengan: pip install pyarrow")
+
+# Fungsi untuk mendapatkan folder partisi dari sebuah tanggal
+def partition_path(day, root=HISTORY_DIR):
+    """Folder partisi untuk tanggal `day` (date, datetime, Timestamp, atau string YYYY-MM-DD)."""
+    day = day[:10] if isinstance(day, str) else day.strftime('%Y-%m-%d')
+    return os.path.join(root, f"date={day}")
+
+# Fungsi untuk menyimpan satu snapshot ke history
+def write_snapshot(df, root=HISTORY_DIR):
+    """
+    Menyimpan satu snapshot hasil clean_and_format_data sebagai file Parquet kecil
+    di partisi tanggal pull_timestamp-nya. Mengembalikan path file yang ditulis.
+    """
+    _require_pyarrow()
+    pull_timestamp = df['pull_timestamp'].iloc[0]
+    folder = partition_path(_as_utc(pull_timestamp), root)
+    os.makedirs(folder, exist_ok=True)
+
+    file_path = os.path.join(folder, f"snapshot-{pull_timestamp:%H%M%S%f}.parquet")
+    pq.write_table(pa.Table.from_pandas(df, schema=SNAPSHOT_SCHEMA, preserve_index=False), file_path)
+    return file_path
+
+def _parse_utc(value):
+    # Timestamp ISO dari API CMC (akhiran Z) menjadi datetime UTC
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).astimezone(timezone.utc)
+
+# Fungsi untuk menyimpan satu snapshot ke history langsung dari kolom (tanpa pandas)
+def write_columns(columns, root=HISTORY_DIR):
+    """
+    Sama dengan write_snapshot, tetapi dari kolom extract_columns (dict nama kolom -> list/array).
+    Nilai NaN ditulis sebagai null, sama seperti Table.from_pandas. Mengembalikan path file.
+    """
+    _require_pyarrow()
+    pull_timestamp = _parse_utc(columns['pull_timestamp'][0])
+    folder = partition_path(pull_timestamp, root)
+    os.makedirs(folder, exist_ok=True)
+
+    arrays = []
+    for field in SNAPSHOT_SCHEMA:
+        values = columns[field.name]
+        if pa.types.is_timestamp(field.type):
+            values = [_parse_utc(value) for value in values]
+        arrays.append(pa.array(values, type=field.type, from_pandas=True))
+
+    file_path = os.path.join(folder, f"snapshot-{pull_timestamp:%H%M%S%f}.parquet")
+    pq.write_table(pa.Table.from_arrays(arrays, schema=SNAPSHOT_SCHEMA), file_path)
+    return file_path
+
+# Fungsi untuk memilih file Parquet yang partisinya beririsan dengan rentang waktu
+def list_files(start=None, end=None, root=HISTORY_DIR):
+    """Daftar file Parquet dalam partisi tanggal antara `start` dan `end` (inklusif)."""
+    start_day = _as_utc(start).strftime('%Y-%m-%d') if start is not None else None
+    end_day = _as_utc(end).strftime('%Y-%m-%d') if end is not None else None
+
+    files = []
+    for folder in sorted(glob.glob(os.path.join(root, 'date=*'))):
+        day = os.path.basename(folder)[len('date='):]
+        if (start_day and day < start_day) or (end_day and day > end_day):
+            continue
+        files.extend(sorted(glob.glob(os.path.join(folder, '*.parquet'))))
+    return files
+
+# Fungsi untuk membaca history dengan proyeksi kolom dan filter waktu
+def read_history(columns=None, start=None, end=None, coin_ids=None, root=HISTORY_DIR):
+    """
+    Membaca history sebagai DataFrame.
+    - columns: hanya kolom ini yang dibaca dari disk (pull_timestamp selalu ikut).
+    - start/end: rentang pull_timestamp; partisi di luar rentang tidak dibuka sama sekali,
+      dan filter diteruskan ke pembaca Parquet (row group yang tidak cocok dilewati).
+    - coin_ids: hanya baris untuk id koin ini (juga diteruskan ke pembaca Parquet).
+    File dibaca melalui memory map.
+    """
+    _require_pyarrow()
+    if columns is not None and 'pull_timestamp' not in columns:
+        columns = list(columns) + ['pull_timestamp']
+
+    files = list_files(start, end, root)
+    if not files:
+        # Hasil kosong tetap memakai kolom dan tipe yang sama dengan hasil yang berisi
+        empty = SNAPSHOT_SCHEMA.empty_table()
+        return (empty if columns is None else empty.select(columns)).to_pandas()
+
+    filters = []
+    if start is not None:
+        filters.append(('pull_timestamp', '>=', _as_utc(start)))
+    if end is not None:
+        filters.append(('pull_timestamp', '<=', _as_utc(end)))
+    if coin_ids is not None:
+        filters.append(('id', 'in', [int(coin_id) for coin_id in coin_ids]))
+
+    # Tanggal sudah ada di pull_timestamp, jadi kolom partisi dari nama folder tidak ikut dibaca
+    table = pq.read_table(
+        files, columns=columns, filters=filters or None, memory_map=True, partitioning=None
+    )
+    return table.to_pandas()
+
+# Fungsi untuk membaca N hari terakhir, misalnya "7 hari terakhir, harga dan volume saja"
+def read_last_days(days, columns=None, coin_ids=None, root=HISTORY_DIR):
+    """Membaca history `days` hari terakhir dengan kolom tertentu saja."""
+    import pandas as pd
+
+    end = pd.Timestamp.now(tz='UTC')
+    return read_history(
+        columns=columns, start=end - pd.Timedelta(days=days), end=end, coin_ids=coin_ids, root=root
+    )
+
+def _as_utc(value):
+    import pandas as pd
+
+    timestamp = pd.Timestamp(value)
+    return timestamp.tz_localize('UTC') if timestamp.tzinfo is None else timestamp.tz_convert('UTC')
+
+# Fungsi untuk menggabungkan file snapshot kecil dalam satu partisi menjadi satu file harian
+def compact_partition(day, root=HISTORY_DIR):
+    """
+    Menggabungkan semua snapshot-*.parquet (dan daily.parquet lama) dalam partisi `day`
+    menjadi satu daily.parquet yang terurut berdasarkan waktu. Mengembalikan jumlah file yang digabung.
+    """
+    _require_pyarrow()
+    folder = partition_path(day, root)
+    snapshots = sorted(glob.glob(os.path.join(folder, 'snapshot-*.parquet')))
+    if not snapshots:
+        return 0
+
+    daily_path = os.path.join(folder, DAILY_FILE)
+    sources = ([daily_path] if os.path.exists(daily_path) else []) + snapshots
+    # File lama (ditulis sebelum ada SNAPSHOT_SCHEMA) disamakan dulu skemanya
+    table = pa.concat_tables([
+        pq.read_table(path, memory_map=True).select(SNAPSHOT_SCHEMA.names).cast(SNAPSHOT_SCHEMA)
+        for path in sources
+    ])
+    table = table.sort_by([('pull_timestamp', 'ascending'), ('cmc_rank', 'ascending')])
+
+    # Tulis ke file sementara dulu agar pembaca tidak melihat file harian yang setengah jadi
+    tmp_path = daily_path + '.tmp'
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, daily_path)
+    for path in snapshots:
+        os.remove(path)
+    return len(sources)
+
+# Fungsi untuk memadatkan semua partisi sebelum hari ini
+def compact_history(root=HISTORY_DIR, before=None):
+    """Memadatkan setiap partisi dengan tanggal sebelum `before` (default: hari ini, UTC)."""
+    before_day = (_as_utc(before) if before is not None else datetime.now(timezone.utc)).strftime('%Y-%m-%d')
+    compacted = 0
+    for folder in sorted(glob.glob(os.path.join(root, 'date=*'))):
+        day = os.path.basename(folder)[len('date='):]
+        if day < before_day and compact_partition(day, root):
+            compacted += 1
+    return compacted
+
+if __name__ == "__main__":
+    print("Memadatkan partisi history...")
+    print(f"{compact_history()} partisi berhasil dipadatkan.")
@@ -0,0 +1,218 @@
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# --- Konfigurasi default client HTTP ---
+# Batas waktu membuka koneksi dan menunggu respons dipisah (detik)
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 10
+# Jumlah percobaan ulang setelah percobaan pertama gagal
+MAX_RETRIES = 3
+# Backoff eksponensial: BACKOFF_BASE * 2^n detik, dibatasi BACKOFF_CAP, dengan full jitter.
+# Retry-After pada 429 ditunggu persis selama masih <= BACKOFF_CAP; jika lebih lama, request
+# langsung gagal (tidak tidur), agar satu siklus collector tetap punya batas waktu
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 30.0
+# Jumlah catatan percobaan terakhir yang disimpan client untuk latency_summary
+ATTEMPT_HISTORY = 1000
+# Status yang layak dicoba ulang: rate limit dan error sisi server
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+# Error saat circuit breaker sedang terbuka (request tidak dikirim sama sekali)
+class CircuitOpenError(requests.exceptions.RequestException):
+    pass
+
+
+# Kelas circuit breaker untuk gagal cepat selama gangguan (misalnya DNS gagal berturut-turut)
+class CircuitBreaker:
+    """
+    Setelah `failure_threshold` kegagalan berturut-turut, breaker terbuka dan semua request
+    langsung ditolak selama `reset_timeout` detik. Setelah itu satu request percobaan diizinkan
+    (half-open): jika berhasil breaker tertutup kembali, jika gagal breaker terbuka lagi.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self):
+        """True jika request boleh dikirim sekarang."""
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+# Fungsi untuk membaca header Retry-After (detik atau tanggal HTTP)
+def parse_retry_after(value):
+    """Mengembalikan jumlah detik dari header Retry-After, atau None jika tidak valid."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+# Kelas client HTTP bersama untuk semua pemanggilan API
+class HttpClient:
+    """
+    Session keep-alive dengan pool koneksi, timeout connect/read terpisah, retry dengan
+    backoff eksponensial + jitter (menghormati Retry-After pada 429), dan circuit breaker.
+    Setiap percobaan dicatat di `attempts` (url, percobaan ke-, status, latensi, byte, error),
+    dibatasi ATTEMPT_HISTORY catatan terakhir agar proses yang berjalan lama tidak terus membesar;
+    `on_attempt` opsional dipanggil dengan catatan yang sama.
+    """
+
+    def __init__(self, headers=None, pool_size=4, connect_timeout=CONNECT_TIMEOUT,
+                 read_timeout=READ_TIMEOUT, max_retries=MAX_RETRIES, backoff_base=BACKOFF_BASE,
+                 backoff_cap=BACKOFF_CAP, breaker=None, on_attempt=None, attempt_history=ATTEMPT_HISTORY):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update(headers or {})
+
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.breaker = breaker or CircuitBreaker()
+        self.on_attempt = on_attempt
+        self.attempts = deque(maxlen=attempt_history)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.session.close()
+
+    def _backoff(self, retry_number, response=None):
+        """Detik menunggu sebelum retry, atau None jika Retry-After server melebihi backoff_cap."""
+        if response is not None and response.status_code == 429:
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if retry_after is not None:
+                # Retry lebih cepat dari yang diminta server hanya akan kena 429 lagi
+                return retry_after if retry_after <= self.backoff_cap else None
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** retry_number))
+
+    def _record(self, url, attempt, started, status=None, error=None, nbytes=None, sink=None):
+        record = {
+            'url': url,
+            'attempt': attempt,
+            'status': status,
+            'latency': time.perf_counter() - started,
+            'bytes': nbytes,
+            'error': error,
+        }
+        self.attempts.append(record)
+        if sink is not None:
+            sink.append(record)
+        if self.on_attempt:
+            self.on_attempt(record)
+
+    def get(self, url, params=None, attempts=None):
+        """
+        GET dengan retry. Mengembalikan response yang sukses, atau menimbulkan
+        requests.exceptions.HTTPError / RequestException terakhir jika semua percobaan gagal
+        (juga tanpa retry jika Retry-After melebihi backoff_cap).
+        CircuitOpenError ditimbulkan tanpa mengirim request jika breaker terbuka.
+        Jika `attempts` (list) diberikan, catatan percobaan panggilan ini juga ditambahkan ke sana.
+        """
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow():
+                raise CircuitOpenError(f"Circuit breaker terbuka, request ke {url} dibatalkan.")
+
+            started = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+                nbytes = len(response.content)
+            except requests.exceptions.RequestException as e:
+                # Termasuk error saat membaca body (ChunkedEncodingError, ContentDecodingError)
+                self._record(url, attempt, started, error=type(e).__name__, sink=attempts)
+                self.breaker.record_failure()
+                response = None
+                error = e
+            except BaseException:
+                # Error lain tidak dicoba ulang, tetapi percobaan half-open tetap harus diakhiri,
+                # kalau tidak breaker akan menolak semua request berikutnya
+                self.breaker.record_failure()
+                raise
+            else:
+                self._record(url, attempt, started, status=response.status_code, nbytes=nbytes, sink=attempts)
+                if response.status_code not in RETRY_STATUSES:
+                    # Error 4xx lain (misalnya API key salah) tidak akan membaik dengan retry
+                    self.breaker.record_success()
+                    response.raise_for_status()
+                    return response
+                self.breaker.record_failure()
+                error = requests.exceptions.HTTPError(
+                    f"{response.status_code} Error for url: {response.url}", response=response
+                )
+
+            delay = None if attempt == self.max_retries else self._backoff(attempt, response)
+            if delay is None:
+                raise error
+            time.sleep(delay)
+
+    def get_json(self, url, params=None, attempts=None):
+        return self.get(url, params, attempts).json()
+
+    def latency_summary(self):
+        """Ringkasan latensi semua percobaan: jumlah, retry, p50, p95, dan maksimum (detik)."""
+        latencies = sorted(record['latency'] for record in self.attempts)
+        if not latencies:
+            return {'attempts': 0}
+
+        def percentile(q):
+            return latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+
+        return {
+            'attempts': len(latencies),
+            'retries': sum(1 for record in self.attempts if record['attempt'] > 0),
+            'p50': percentile(0.50),
+            'p95': percentile(0.95),
+            'max': latencies[-1],
+        }
@@ -0,0 +1,183 @@
+import argparse
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# --- Metrik Per Tahap Pipeline (JSON Lines) ---
+# Setiap tahap (fetch, decode JSON, cleaning, simpan CSV, insert DB, ekspor CSV) menulis satu
+# baris JSON: waktu, run_id, nama tahap, durasi, jumlah baris/byte, status HTTP, jumlah retry,
+# dan error jika gagal. File bisa diganti lewat PIPELINE_METRICS_FILE (string kosong = nonaktif).
+METRICS_FILE = os.getenv(
+    'PIPELINE_METRICS_FILE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'metrics.jsonl')
+)
+# Jika diisi, ringkasan Prometheus (format teks) ditulis ke file ini oleh CLI summary
+PROMETHEUS_FILE = os.getenv('PIPELINE_PROMETHEUS_FILE', '')
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Satu id per proses, untuk mengelompokkan tahap-tahap dari siklus yang sama
+RUN_ID = uuid.uuid4().hex[:12]
+_lock = threading.Lock()
+
+
+def emit(record, path=None):
+    """Menambahkan satu record ke file metrik (aman dipanggil dari beberapa thread)."""
+    path = METRICS_FILE if path is None else path
+    if not path:
+        return
+    line = json.dumps({
+        'ts': datetime.now(timezone.utc).isoformat(),
+        'run_id': RUN_ID,
+        **record,
+    }, default=str)
+    with _lock:
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+
+
+@contextmanager
+def stage(name, **fields):
+    """
+    Mengukur durasi satu tahap. Blok bisa mengisi field tambahan lewat dict yang di-yield,
+    misalnya rows, bytes, http_status, atau retries. Exception tetap diteruskan,
+    tetapi dicatat dengan ok=False.
+    """
+    record = {'stage': name, **fields}
+    started = time.perf_counter()
+    try:
+        yield record
+    except BaseException as e:
+        record['ok'] = False
+        record['error'] = type(e).__name__
+        raise
+    finally:
+        record['duration_s'] = time.perf_counter() - started
+        record.setdefault('ok', True)
+        emit(record)
+
+
+def record_http_attempt(attempt):
+    """Callback on_attempt untuk HttpClient: satu record per percobaan request."""
+    emit({
+        'stage': 'http_request',
+        'duration_s': attempt['latency'],
+        'http_status': attempt['status'],
+        'attempt': attempt['attempt'],
+        'bytes': attempt.get('bytes'),
+        'ok': attempt['error'] is None and attempt['status'] is not None and attempt['status'] < 400,
+        'error': attempt['error'],
+    })
+
+
+# --- Ringkasan ---
+# pandas hanya diimpor oleh fungsi ringkasan, sehingga pencatatan metrik tidak menambah waktu import
+def read_records(path=METRICS_FILE, since=None):
+    """Membaca record metrik sebagai DataFrame, opsional hanya yang lebih baru dari `since`."""
+    import pandas as pd
+
+    records = []
+    try:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # Baris terpotong (misalnya proses mati saat menulis) dilewati
+                    continue
+    except FileNotFoundError:
+        pass
+
+    df = pd.DataFrame(records)
+    if df.empty:
+        return df
+    df['ts'] = pd.to_datetime(df['ts'], utc=True, format='ISO8601')
+    if since is not None:
+        df = df[df['ts'] >= since]
+    return df
+
+
+def summarize(df):
+    """Jumlah, p50/p95/p99 dan maksimum durasi, total baris/byte, dan jumlah error per tahap."""
+    import pandas as pd
+
+    columns = ['count', 'p50_s', 'p95_s', 'p99_s', 'max_s', 'rows', 'bytes', 'errors']
+    if df.empty:
+        return pd.DataFrame(columns=columns)
+
+    df = df.reindex(columns=df.columns.union(['rows', 'bytes', 'ok'], sort=False))
+    df['failed'] = df['ok'].eq(False)
+    grouped = df.groupby('stage')
+    summary = pd.DataFrame({
+        'count': grouped.size(),
+        **{f"p{int(q * 100)}_s": grouped['duration_s'].quantile(q) for q in QUANTILES},
+        'max_s': grouped['duration_s'].max(),
+        'rows': grouped['rows'].sum(min_count=1).astype('Int64'),
+        'bytes': grouped['bytes'].sum(min_count=1).astype('Int64'),
+        'errors': grouped['failed'].sum(),
+    })
+    return summary[columns]
+
+
+def to_prometheus(summary):
+    """Ringkasan dalam format teks Prometheus (untuk node_exporter textfile collector)."""
+    import pandas as pd
+
+    lines = [
+        '# HELP pipeline_stage_duration_seconds Durasi tahap pipeline.',
+        '# TYPE pipeline_stage_duration_seconds summary',
+    ]
+    for name, row in summary.iterrows():
+        for q in QUANTILES:
+            lines.append(f'pipeline_stage_duration_seconds{{stage="{name}",quantile="{q}"}} '
+                         f'{row[f"p{int(q * 100)}_s"]:.6f}')
+        lines.append(f'pipeline_stage_duration_seconds_count{{stage="{name}"}} {int(row["count"])}')
+    lines += [
+        '# HELP pipeline_stage_errors_total Jumlah tahap yang gagal.',
+        '# TYPE pipeline_stage_errors_total counter',
+    ]
+    lines += [f'pipeline_stage_errors_total{{stage="{name}"}} {int(row["errors"])}'
+              for name, row in summary.iterrows()]
+    lines += [
+        '# HELP pipeline_stage_rows_total Jumlah baris yang diproses.',
+        '# TYPE pipeline_stage_rows_total counter',
+    ]
+    lines += [f'pipeline_stage_rows_total{{stage="{name}"}} {int(row["rows"])}'
+              for name, row in summary.iterrows() if pd.notna(row['rows'])]
+    return '\n'.join(lines) + '\n'
+
+
+def write_prometheus(summary, path):
+    """Menulis ringkasan Prometheus secara atomik."""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(to_prometheus(summary))
+    os.replace(tmp_path, path)
+
+
+def main():
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Ringkasan metrik per tahap pipeline (p50/p95/p99).")
+    parser.add_argument('--file', default=METRICS_FILE)
+    parser.add_argument('--window', default='24h', help="rentang waktu, misalnya 1h, 24h, 7d (default 24h)")
+    parser.add_argument('--prometheus', default=PROMETHEUS_FILE, help="tulis juga ringkasan format Prometheus")
+    args = parser.parse_args()
+
+    since = datetime.now(timezone.utc) - pd.Timedelta(args.window) if args.window else None
+    summary = summarize(read_records(args.file, since))
+    if summary.empty:
+        print(f"Tidak ada metrik di {args.file} dalam {args.window} terakhir.")
+        return
+
+    print(summary.to_string(float_format=lambda value: f"{value:.4f}"))
+    if args.prometheus:
+        write_prometheus(summary, args.prometheus)
+        print(f"Ringkasan Prometheus ditulis ke {args.prometheus}")
+
+
+if __name__ == "__main__":
+    main()
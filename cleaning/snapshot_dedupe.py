@@ -0,0 +1,65 @@
+import hashlib
+import json
+import os
+
+# File state default: fingerprint terakhir yang sudah disimpan untuk setiap koin
+STATE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'snapshot_state.json')
+
+# Field yang menentukan apakah data sebuah koin berubah
+QUOTE_FIELDS = [
+    'price', 'volume_24h', 'market_cap',
+    'percent_change_1h', 'percent_change_24h', 'percent_change_7d', 'last_updated'
+]
+
+# Fungsi untuk membuat fingerprint data satu koin
+def coin_fingerprint(coin):
+    """Hash singkat dari cmc_rank dan field quote USD sebuah koin."""
+    quote = coin.get('quote', {}).get('USD', {})
+    values = [coin.get('cmc_rank')] + [quote.get(field) for field in QUOTE_FIELDS]
+    return hashlib.blake2b(json.dumps(values).encode(), digest_size=8).hexdigest()
+
+
+# Kelas untuk membuang koin yang datanya tidak berubah sejak snapshot terakhir yang disimpan
+class SnapshotDeduper:
+    """
+    Menyimpan fingerprint terakhir per id koin (di file JSON) dan menyaring payload API
+    sehingga hanya koin yang berubah yang diteruskan ke storage.
+    State baru hanya ditulis ke disk lewat commit(), setelah penyimpanan data berhasil.
+    """
+
+    def __init__(self, state_path=STATE_FILE):
+        self.state_path = state_path
+        self.fingerprints = {}
+        self._pending = {}
+        try:
+            with open(state_path) as f:
+                self.fingerprints = json.load(f)
+        except (OSError, ValueError):
+            # State belum ada atau rusak: semua koin dianggap berubah
+            self.fingerprints = {}
+
+    def filter_changed(self, raw_data):
+        """
+        Mengembalikan payload dengan bentuk yang sama tetapi hanya berisi koin yang berubah.
+        Payload dengan 'data' kosong berarti tidak ada yang perlu disimpan.
+        """
+        changed = []
+        self._pending = {}
+        for coin in raw_data['data']:
+            key = str(coin['id'])
+            fingerprint = coin_fingerprint(coin)
+            if self.fingerprints.get(key) != fingerprint:
+                changed.append(coin)
+                self._pending[key] = fingerprint
+        return {**raw_data, 'data': changed}
+
+    def commit(self):
+        """Menyimpan fingerprint koin yang terakhir disaring ke file state (ditulis atomik)."""
+        if not self._pending:
+            return
+        self.fingerprints.update(self._pending)
+        self._pending = {}
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.fingerprints, f, separators=(',', ':'), sort_keys=True)
+        os.replace(tmp_path, self.state_path)
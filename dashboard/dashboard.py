@@ -1,46 +1,281 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+import plotly.io as pio
 import os
-import streamlit.components.v1 as components
-from datetime import datetime
+import hashlib
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+
+# Shared analytics modules live in analysis/scripts (also used by the notebook),
+# the snapshot history store lives next to the collector in cleaning, and the SQLite
+# snapshot index next to the database collector in analysis/local-automation
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'analysis', 'scripts'))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'cleaning'))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'analysis', 'local-automation'))
+import history_store
+from alerts import ALERTS_FILE, read_alerts
+from coin_registry import CoinRegistry
+from data_loader import read_latest_snapshot
+from derived_cache import DerivedCache
+from downsample import downsample_frame
+from leaderboard import compute_leaderboards
+from snapshot_index import SnapshotIndex, market_as_of
 
 # =======================================================================
 # --- FUNCTIONS TO LOAD DATA FROM LOCAL/GITHUB FILE ---
 # =======================================================================
-@st.cache_data(ttl=360)
-def load_latest_data():
+DATA_FILE = 'cleaning/updated_file.csv'
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _file_digest(file_path, mtime_ns, size):
+    """Content hash of the data file. Only recomputed when its mtime or size changes."""
+    with open(file_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def get_data_version(file_path=DATA_FILE):
+    """
+    Cheap version probe run on every rerun. It stats the file and returns a content hash,
+    so a fresh checkout with identical content keeps the same version. Returns None if
+    the file does not exist.
+    """
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    return _file_digest(file_path, stat.st_mtime_ns, stat.st_size)
+
+
+@st.cache_data(max_entries=2)
+def load_latest_data(data_version, file_path=DATA_FILE):
     """
     Loads the latest snapshot of data from the updated_file.csv file.
     This function is now designed to work with a CSV that may contain historical data,
     but it only returns the most recent entry for each coin for the main dashboard metrics.
+    The cache is keyed on `data_version`, so the file is only re-parsed when its content changes.
     """
-    file_path = 'cleaning/updated_file.csv'
-    
-    if not os.path.exists(file_path):
+    if data_version is None:
         st.error(f"File '{file_path}' not found. Make sure you have uploaded it to the root of your GitHub repository.")
         return pd.DataFrame()
         
     try:
-        df = pd.read_csv(file_path)
-        
-        # Check for the date column
-        if 'last_updated_utc+0' in df.columns:
-            df['last_updated'] = pd.to_datetime(df['last_updated_utc+0'])
-        elif 'last_updated' in df.columns:
-            df['last_updated'] = pd.to_datetime(df['last_updated'])
-        else:
-            st.error("No date column found. Please ensure 'last_updated_utc+0' or 'last_updated' exists.")
-            return pd.DataFrame()
-        
-        # Get the latest data for each coin
-        latest_df = df.sort_values('last_updated').drop_duplicates(subset=['symbol'], keep='last')
-        return latest_df
+        return read_latest_snapshot(file_path)
+    except ValueError as e:
+        st.error(str(e))
+        return pd.DataFrame()
     except Exception as e:
         st.error(f"An error occurred while loading or processing the data: {e}")
         return pd.DataFrame()
 
 
+# Maximum number of points sent to the browser per chart (roughly its width in pixels)
+CHART_POINT_BUDGET = 1000
+HISTORY_RANGES = {
+    '24 Hours': 1,
+    '7 Days': 7,
+    '30 Days': 30,
+    '1 Year': 365,
+}
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def load_price_history(coin_id, days, data_version, point_budget=CHART_POINT_BUDGET):
+    """
+    Loads the price history of one coin for the last `days` days from the Parquet history store
+    and downsamples it (LTTB) to at most `point_budget` points before it is sent to Plotly.
+    Only the needed columns and partitions are read. `data_version` keys the cache so
+    new snapshots are picked up.
+    """
+    try:
+        df = history_store.read_last_days(days, columns=['id', 'price'], coin_ids=[coin_id])
+    except ImportError:
+        return pd.DataFrame()
+    if df.empty:
+        # No history partition covers the range yet
+        return df
+
+    df = df.sort_values('pull_timestamp')
+    return downsample_frame(df, 'pull_timestamp', 'price', point_budget)
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def load_alerts(mtime_ns, limit=20, file_path=ALERTS_FILE):
+    """Latest anomaly alerts, newest first. Keyed on the alert file's mtime, so it is re-read on new alerts."""
+    return pd.DataFrame(read_alerts(file_path, limit))
+
+
+def get_alerts_version(file_path=ALERTS_FILE):
+    """mtime of the alert file, or None if no alert has been written yet."""
+    try:
+        return os.stat(file_path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+# SQLite database written by the collector; the time-travel section is shown only when it exists
+SNAPSHOT_DB = os.getenv('CRYPTO_DB_PATH', 'analysis/database/crypto_data.db')
+# Slider granularity, matching the collector's schedule
+SNAPSHOT_SLIDER_STEP = timedelta(minutes=6)
+
+
+def _connect_snapshot_db(db_path=SNAPSHOT_DB):
+    # Read-only, so the dashboard never takes locks that block the collector's writes
+    return sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+
+
+def get_snapshot_db_version(db_path=SNAPSHOT_DB):
+    """mtimes of the database and its WAL (new snapshots change one of them), or None."""
+    try:
+        version = os.stat(db_path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    try:
+        return version, os.stat(db_path + '-wal').st_mtime_ns
+    except FileNotFoundError:
+        return version, None
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def load_snapshot_index(db_version, db_path=SNAPSHOT_DB):
+    """Sorted snapshot timestamps and rowid ranges, loaded once per database version for all sessions."""
+    conn = _connect_snapshot_db(db_path)
+    try:
+        return SnapshotIndex.load(conn)
+    finally:
+        conn.close()
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def load_market_as_of(snapshot_ts, db_version, db_path=SNAPSHOT_DB):
+    """
+    The market at one indexed snapshot (binary search plus keyframe and rowid-range reads).
+    Keyed on the located snapshot rather than the slider value, so nearby slider positions share it.
+    """
+    conn = _connect_snapshot_db(db_path)
+    try:
+        return market_as_of(conn, snapshot_ts, load_snapshot_index(db_version, db_path))
+    finally:
+        conn.close()
+
+
+ALERT_LABELS = {
+    'price_spike': 'Price spike',
+    'volume_surge': 'Volume surge',
+    'rank_jump': 'Rank jump',
+}
+
+
+def describe_alert(alert):
+    """One-line description of an alert's size."""
+    if alert['kind'] == 'price_spike':
+        return f"{alert['change']:+.2f}% (z={alert['z']:+.1f})"
+    if alert['kind'] == 'volume_surge':
+        return f"{alert['change']:.1f}x average volume (z={alert['z']:+.1f})"
+    return f"{int(alert['change']):+d} ranks to #{int(alert['cmc_rank'])}"
+
+
+# Memory budget of the derived-data cache shared by all sessions of this server process
+DERIVED_CACHE_BYTES = 256 * 2 ** 20
+COMPARISON_COLORS = ["#1984c5", "#22a7f0", "#63bff0", "#a7d5ed", "#e2e2e2", "#e1a692", "#de6e56", "#e14b31", "#c23728"]
+TABLE_COLUMNS = {
+    'cmc_rank': 'Rank',
+    'name': 'Name',
+    'symbol': 'Symbol',
+    'price': 'Price (USD)',
+    'market_cap': 'Market Cap (USD)',
+    'volume_24h': 'Volume 24h (USD)',
+    'percent_change_24h': 'Change 24h (%)',
+    'last_updated': 'Last Updated'
+}
+
+
+@st.cache_resource
+def get_derived_cache():
+    """
+    One LRU cache per server process. Aggregates, leaderboards, the data table and figure specs
+    are stored under (artifact, data version, selection), so concurrent viewers of the same
+    snapshot reuse one computation instead of redoing it on every rerun.
+    """
+    return DerivedCache(max_bytes=DERIVED_CACHE_BYTES)
+
+
+def compute_aggregates(df):
+    """Total 24h volume and market cap of the snapshot."""
+    return {
+        'volume_24h': float(df['volume_24h'].sum()),
+        'market_cap': float(df['market_cap'].sum()),
+    }
+
+
+def build_table(df):
+    """The data table frame: sorted by rank, with display column names."""
+    return df.sort_values(by='cmc_rank', ascending=True)[list(TABLE_COLUMNS)].rename(columns=TABLE_COLUMNS)
+
+
+def build_comparison_figure(df, registry, selected_ids, metric, display_metric):
+    """JSON spec of the bar chart comparing `metric` across the selected coin ids."""
+    selected = df[df['id'].isin(selected_ids)]
+    fig = px.bar(
+        # Labels come from the registry, so coins sharing a name or symbol stay separate bars
+        selected.assign(coin=[registry.label(coin_id) for coin_id in selected['id']]),
+        x='coin',
+        y=metric,
+        color='coin',
+        color_discrete_sequence=COMPARISON_COLORS,
+        # Use the display metric name for the title and labels
+        title=f"Comparison of {display_metric}",
+        labels={'coin': 'Coin Name', metric: f'{display_metric} (USD)'}
+    )
+    # Add a transition animation to the chart
+    fig.update_layout(transition_duration=500)
+    return fig.to_json()
+
+
+def build_history_figure(df_history, title):
+    """JSON spec of the historical price line chart."""
+    fig = px.line(
+        df_history,
+        x='pull_timestamp',
+        y='price',
+        title=title,
+        labels={'pull_timestamp': 'Time (UTC)', 'price': 'Price (USD)'}
+    )
+    fig.update_traces(line_color="#22a7f0")
+    return fig.to_json()
+
+
+def format_gain(value):
+    """HTML for a gainer's percent change."""
+    return (f'<div class="change-container"><span class="gain">{value:.2f}%</span>'
+            f'<i class="fas fa-caret-up trend-icon gain"></i></div>')
+
+
+def format_loss(value):
+    """HTML for a loser's percent change."""
+    return (f'<div class="change-container"><span class="loss">{value:.2f}%</span>'
+            f'<i class="fas fa-caret-down trend-icon loss"></i></div>')
+
+
+def format_usd_amount(value):
+    """HTML for a USD amount such as volume or market cap."""
+    return f'<p>${value:.2f}</p>'
+
+
+def render_leaderboard_card(title, entries, format_value):
+    """Renders a leaderboard card (title and all rows) as a single HTML element."""
+    rows = "".join(
+        f'<div class="key-coin-list-item flex-row">'
+        f'<div><h5>{entry["name"]} ({entry["symbol"]})</h5></div>'
+        f'{format_value(entry["value"])}'
+        f'</div>'
+        for entry in entries
+    )
+    st.markdown(f"<h5>{title}</h5>{rows}", unsafe_allow_html=True)
+
+
 # =======================================================================
 # --- STREAMLIT DASHBOARD CONFIGURATION ---
 # =======================================================================
@@ -241,21 +476,30 @@ st.markdown("""
 st.image("https://images.unsplash.com/photo-1640161704729-cbe966a08476?q=80&w=872&auto=format&fit=crop&ixlib=rb-4.1.0&ixid=M3wxMjA3fDB8MHxwaG90by1wYWdlfHx8fGVufDB8fHx8fA%3D%3D", use_container_width=True)
 
 if st.button("Refresh Data", help="Fetch the latest data from the CSV file"):
-    st.cache_data.clear()
+    # Only drop the data cache; other caches in the app stay warm
+    load_latest_data.clear()
     st.rerun()
 
-# Load latest data
-df_latest = load_latest_data()
+# Load latest data (re-parsed only when the file content has changed)
+data_version = get_data_version()
+df_latest = load_latest_data(data_version)
+derived = get_derived_cache()
+# Coins are keyed by CMC id everywhere below: symbols are not unique across coins
+# (an empty frame from a failed load has no columns, so it gets an empty registry)
+registry = CoinRegistry()
+if not df_latest.empty:
+    registry = derived.get_or_compute(('registry', data_version), lambda: CoinRegistry.from_frame(df_latest))
 
 
 with st.sidebar:
     with st.expander("Customization Options"):
         if not df_latest.empty:
-            coin_options = df_latest['symbol'].tolist()
+            coin_options = df_latest['id'].tolist()
             selected_coins = st.multiselect(
                 "Select Coins for Comparison:",
                 options=coin_options,
-                default=coin_options[:3] if len(coin_options) >= 3 else coin_options
+                default=coin_options[:3] if len(coin_options) >= 3 else coin_options,
+                format_func=registry.label
             )
 
             # Map user-friendly names to actual column names
@@ -276,7 +520,13 @@ with st.sidebar:
             selected_coin_historical = st.selectbox(
                 "Select Coin for Historical Chart:",
                 options=coin_options,
-                index=0 # Default to the first coin
+                index=0, # Default to the first coin
+                format_func=registry.label
+            )
+            selected_history_range = st.selectbox(
+                "Select Time Range for Historical Chart:",
+                options=list(HISTORY_RANGES.keys()),
+                index=1
             )
 
         else:
@@ -308,8 +558,9 @@ st.subheader("Aggregate Data Summary")
 if not df_latest.empty:
     # Combine the metrics into a single container
     with st.container(border=True):
-        total_volume = df_latest['volume_24h'].sum()
-        total_market_cap = df_latest['market_cap'].sum()
+        aggregates = derived.get_or_compute(('aggregates', data_version), lambda: compute_aggregates(df_latest))
+        total_volume = aggregates['volume_24h']
+        total_market_cap = aggregates['market_cap']
         
         # Use columns to place them side-by-side within the container
         agg_col1, agg_col2 = st.columns(2)
@@ -324,75 +575,85 @@ else:
 st.markdown("---")
 st.subheader("Key Coin Analysis")
 if not df_latest.empty:
-    # Top 5 Daily Gainers and Losers
-    top_gainers = df_latest.sort_values(by='percent_change_24h', ascending=False).head(5)
-    top_losers = df_latest.sort_values(by='percent_change_24h', ascending=True).head(5)
+    # All four top-5 lists are computed in one pass with partial selection (no full sorts)
+    leaderboards = derived.get_or_compute(('leaderboards', data_version, 5),
+                                          lambda: compute_leaderboards(df_latest, k=5))
 
+    # Top 5 Daily Gainers and Losers
     col_gainer, col_loser = st.columns(2)
     
     with col_gainer:
         with st.container(border=True):
-            st.markdown("<h5>Top 5 Daily Gainers</h5>", unsafe_allow_html=True)
-            for _, row in top_gainers.iterrows():
-                st.markdown(f"""
-                <div class="key-coin-list-item flex-row">
-                    <div>
-                        <h5>{row['name']} ({row['symbol']})</h5>
-                    </div>
-                    <div class="change-container">
-                        <span class="gain">{row['percent_change_24h']:.2f}%</span>
-                        <i class="fas fa-caret-up trend-icon gain"></i>
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
+            render_leaderboard_card("Top 5 Daily Gainers", leaderboards['gainers'], format_gain)
 
     with col_loser:
         with st.container(border=True):
-            st.markdown("<h5>Top 5 Daily Losers</h5>", unsafe_allow_html=True)
-            for _, row in top_losers.iterrows():
-                st.markdown(f"""
-                <div class="key-coin-list-item flex-row">
-                    <div>
-                        <h5>{row['name']} ({row['symbol']})</h5>
-                    </div>
-                    <div class="change-container">
-                        <span class="loss">{row['percent_change_24h']:.2f}%</span>
-                        <i class="fas fa-caret-down trend-icon loss"></i>
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
+            render_leaderboard_card("Top 5 Daily Losers", leaderboards['losers'], format_loss)
 
     # Top 5 Trading Volume and Market Cap
-    top_volume = df_latest.sort_values(by='volume_24h', ascending=False).head(5)
-    top_market_cap_list = df_latest.sort_values(by='market_cap', ascending=False).head(5)
-
     col_volume, col_market_cap = st.columns(2)
     
     with col_volume:
         with st.container(border=True):
-            st.markdown("<h5>Top 5 Trading Volume</h5>", unsafe_allow_html=True)
-            for _, row in top_volume.iterrows():
-                st.markdown(f"""
-                <div class="key-coin-list-item flex-row">
-                    <div>
-                        <h5>{row['name']} ({row['symbol']})</h5>
-                    </div>
-                    <p>${row['volume_24h']:.2f}</p>
-                </div>
-                """, unsafe_allow_html=True)
+            render_leaderboard_card("Top 5 Trading Volume", leaderboards['volume'], format_usd_amount)
                 
     with col_market_cap:
         with st.container(border=True):
-            st.markdown("<h5>Top 5 Biggest Market Cap</h5>", unsafe_allow_html=True)
-            for _, row in top_market_cap_list.iterrows():
-                st.markdown(f"""
-                <div class="key-coin-list-item flex-row">
-                    <div>
-                        <h5>{row['name']} ({row['symbol']})</h5>
-                    </div>
-                    <p>${row['market_cap']:.2f}</p>
-                </div>
-                """, unsafe_allow_html=True)
+            render_leaderboard_card("Top 5 Biggest Market Cap", leaderboards['market_cap'], format_usd_amount)
+
+# --- Market Alerts Section ---
+# Written by the collector's streaming anomaly detector (cleaning/alerts.py)
+alerts_version = get_alerts_version()
+if alerts_version is not None:
+    df_alerts = load_alerts(alerts_version)
+    if not df_alerts.empty:
+        st.markdown("---")
+        st.subheader("Market Alerts")
+        with st.container(border=True):
+            st.dataframe(
+                pd.DataFrame({
+                    'Time': pd.to_datetime(df_alerts['timestamp'], format='ISO8601'),
+                    'Coin': df_alerts['name'] + ' (' + df_alerts['symbol'] + ')',
+                    'Alert': df_alerts['kind'].map(ALERT_LABELS),
+                    'Detail': df_alerts.apply(describe_alert, axis=1),
+                }),
+                hide_index=True,
+                use_container_width=True,
+            )
+
+# --- Market Time Travel Section ---
+snapshot_db_version = get_snapshot_db_version()
+snapshot_index = load_snapshot_index(snapshot_db_version) if snapshot_db_version is not None else None
+if snapshot_index is not None and len(snapshot_index) > 1:
+    st.markdown("---")
+    st.subheader("Market Time Travel")
+    with st.container(border=True):
+        chosen_time = st.slider(
+            "Show the market as of:",
+            min_value=snapshot_index.start.to_pydatetime(),
+            max_value=snapshot_index.end.to_pydatetime(),
+            value=snapshot_index.end.to_pydatetime(),
+            step=SNAPSHOT_SLIDER_STEP,
+            format="YYYY-MM-DD HH:mm"
+        )
+        snapshot_ts = snapshot_index.snapshot_at(chosen_time)
+        df_past = load_market_as_of(snapshot_ts, snapshot_db_version)
+        st.caption(f"Snapshot of {snapshot_ts:%Y-%m-%d %H:%M} ({len(df_past)} coins).")
+
+        if not df_past.empty:
+            past_leaderboards = derived.get_or_compute(
+                ('leaderboards_as_of', snapshot_db_version, snapshot_ts, 5),
+                lambda: compute_leaderboards(df_past, k=5)
+            )
+            col_past_gainer, col_past_loser = st.columns(2)
+            with col_past_gainer:
+                render_leaderboard_card("Top 5 Gainers", past_leaderboards['gainers'], format_gain)
+            with col_past_loser:
+                render_leaderboard_card("Top 5 Losers", past_leaderboards['losers'], format_loss)
+            st.dataframe(
+                derived.get_or_compute(('table_as_of', snapshot_db_version, snapshot_ts), lambda: build_table(df_past)),
+                use_container_width=True, hide_index=True
+            )
 
 # --- Data Visualization Section ---
 st.markdown("---")
@@ -401,76 +662,40 @@ if not df_latest.empty:
     with st.container(border=True):
         st.markdown("<h4>Comparison of Selected Coin Metrics</h4>", unsafe_allow_html=True)
         if selected_coins:
-            selected_data = df_latest[df_latest['symbol'].isin(selected_coins)]
-            # Use the internal metric name for the plot's y-axis
-            fig_compare = px.bar(
-                selected_data,
-                x='name',
-                y=selected_metric_internal,
-                color='name',
-                # Set the custom color palette here
-                color_discrete_sequence=["#1984c5", "#22a7f0", "#63bff0", "#a7d5ed", "#e2e2e2", "#e1a692", "#de6e56", "#e14b31", "#c23728"],
-                # Use the display metric name for the title and labels
-                title=f"Comparison of {selected_display_metric}",
-                labels={'name': 'Coin Name', selected_metric_internal: f'{selected_display_metric} (USD)'}
+            comparison_spec = derived.get_or_compute(
+                ('comparison', data_version, tuple(selected_coins), selected_metric_internal),
+                lambda: build_comparison_figure(df_latest, registry, selected_coins, selected_metric_internal,
+                                                selected_display_metric)
             )
-            # Add a transition animation to the chart
-            fig_compare.update_layout(transition_duration=500)
-            st.plotly_chart(fig_compare, use_container_width=True)
+            st.plotly_chart(pio.from_json(comparison_spec), use_container_width=True)
         else:
             st.warning("Select at least one coin in the sidebar to see the comparison.")
 
-    # NEW SECTION: Embed TradingView Historical Chart
+    # Historical chart built from our own snapshot history (downsampled server-side)
     st.markdown("---")
-    st.subheader("Historical Price Chart (via TradingView)")
-    st.info("This chart is embedded from TradingView and displays complete historical data in real-time.")
+    st.subheader("Historical Price Chart")
+    st.info("This chart is built from the snapshots collected by this project's pipeline.")
     if selected_coin_historical:
-        tv_symbol = f"BINANCE:{selected_coin_historical}USDT"
-        
-        # HTML for the TradingView widget
-        tradingview_html = f"""
-        <div class="tradingview-widget-container">
-          <div id="tradingview_widget_container"></div>
-          <script type="text/javascript" src="https://s3.tradingview.com/tv.js"></script>
-          <script type="text/javascript">
-          new TradingView.widget(
-          {{
-          "width": "100%",
-          "height": 500,
-          "symbol": "{tv_symbol}",
-          "interval": "D",
-          "timezone": "Etc/UTC",
-          "theme": "dark",
-          "style": "1",
-          "locale": "en",
-          "toolbar_bg": "#f1f3f6",
-          "enable_publishing": false,
-          "hide_side_toolbar": false,
-          "allow_symbol_change": true,
-          "container_id": "tradingview_widget_container"
-        }}
-          );
-          </script>
-        </div>
-        """
-        
-        # Use st.components.v1.html to embed the widget
-        components.html(tradingview_html, height=500)
+        coin = registry.get(selected_coin_historical)
+        df_history = load_price_history(
+            coin['id'], HISTORY_RANGES[selected_history_range], data_version
+        )
+
+        if df_history.empty:
+            st.warning(f"No collected history available for {coin['name']} in this time range.")
+        else:
+            history_spec = derived.get_or_compute(
+                ('history', data_version, coin['id'], selected_history_range),
+                lambda: build_history_figure(
+                    df_history, f"{registry.label(coin['id'])} Price - {selected_history_range}"
+                )
+            )
+            st.plotly_chart(pio.from_json(history_spec), use_container_width=True)
 
 
 # --- DATA TABLE SECTION ---
 st.markdown("---")
 st.subheader("Crypto Data Table")
 if not df_latest.empty:
-    st.dataframe(df_latest.sort_values(by='cmc_rank', ascending=True)[[
-        'cmc_rank', 'name', 'symbol', 'price', 'market_cap', 'volume_24h', 'percent_change_24h', 'last_updated'
-    ]].rename(columns={
-        'cmc_rank': 'Rank',
-        'name': 'Name',
-        'symbol': 'Symbol',
-        'price': 'Price (USD)',
-        'market_cap': 'Market Cap (USD)',
-        'volume_24h': 'Volume 24h (USD)',
-        'percent_change_24h': 'Change 24h (%)',
-        'last_updated': 'Last Updated'
-    }), use_container_width=True, hide_index=True)
+    st.dataframe(derived.get_or_compute(('table', data_version), lambda: build_table(df_latest)),
+                 use_container_width=True, hide_index=True)
@@ -0,0 +1,22 @@
+import pandas as pd
+
+
+def read_latest_snapshot(file_path):
+    """
+    Reads a snapshot CSV (which may contain historical rows) and returns only the most
+    recent row for each coin id (symbols are not unique on CoinMarketCap, so they cannot
+    be used as the key). Raises ValueError if the file has no date column.
+    Kept free of Streamlit so it can be reused by scripts and benchmarks.
+    """
+    df = pd.read_csv(file_path)
+
+    # Check for the date column
+    if 'last_updated_utc+0' in df.columns:
+        df['last_updated'] = pd.to_datetime(df['last_updated_utc+0'])
+    elif 'last_updated' in df.columns:
+        df['last_updated'] = pd.to_datetime(df['last_updated'])
+    else:
+        raise ValueError("No date column found. Please ensure 'last_updated_utc+0' or 'last_updated' exists.")
+
+    # Get the latest data for each coin
+    return df.sort_values('last_updated', kind='stable').drop_duplicates(subset=['id'], keep='last')
@@ -0,0 +1,103 @@
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+
+def estimate_size(value):
+    """Approximate memory footprint of a cached value in bytes."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(value, pd.DataFrame) else usage)
+    if isinstance(value, (str, bytes)):
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class DerivedCache:
+    """
+    Process-wide LRU cache for values derived from a data snapshot (aggregates, leaderboards,
+    table frames, serialized figures). Keys should include the data version and the widget
+    selection, so every session looking at the same snapshot and selection shares one entry.
+
+    Memory is bounded by `max_bytes` (estimated) and `max_entries`; the least recently used
+    entries are evicted first. Concurrent misses on the same key are computed once: the
+    other callers wait for the first one and then read its result.
+    Cached values are shared between sessions and must not be mutated by callers.
+    """
+
+    def __init__(self, max_bytes=256 * 2 ** 20, max_entries=1024):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def _lookup(self, key):
+        # Caller holds self._lock
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True, entry[0]
+
+    def get_or_compute(self, key, compute):
+        """Returns the cached value for `key`, calling `compute()` (once) on a miss."""
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                return value
+            pending = self._pending.setdefault(key, threading.Lock())
+
+        with pending:
+            with self._lock:
+                # Another session may have computed it while this one waited
+                found, value = self._lookup(key)
+                if found:
+                    return value
+            try:
+                value = compute()
+                self._store(key, value, estimate_size(value))
+            finally:
+                with self._lock:
+                    self._pending.pop(key, None)
+        return value
+
+    def _store(self, key, value, size):
+        with self._lock:
+            self.misses += 1
+            if size > self.max_bytes:
+                # Larger than the whole budget: returned to the caller but not kept
+                return
+            self._entries[key] = (value, size)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes or len(self._entries) > self.max_entries:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def stats(self):
+        """Counters for monitoring the hit rate and memory use."""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.total_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+    Returns the (sorted) positions of at most `n_out` points that preserve the visual shape
+    of the series. `x` must be sorted ascending; first and last points are always kept.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # Bucket edges over the points between the fixed first and last point
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    selected = np.empty(n_out, dtype=np.intp)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    previous = 0
+    for bucket in range(n_out - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        # Average of the next bucket (or the last point) acts as the third triangle vertex
+        next_start, next_end = end, edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x = x[next_start:next_end].mean()
+        next_y = y[next_start:next_end].mean()
+
+        area = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def minmax_indices(y, n_out):
+    """
+    Min/max bucketing: keeps the lowest and highest point of each bucket so spikes survive.
+    Returns sorted positions of at most `n_out` points.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    n_buckets = n_out // 2
+    if n_out >= n or n_buckets < 1:
+        return np.arange(n)
+
+    edges = np.linspace(0, n, n_buckets + 1).astype(np.intp)
+    positions = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end > start:
+            window = y[start:end]
+            positions.append(start + int(np.nanargmin(window)) if not np.isnan(window).all() else start)
+            positions.append(start + int(np.nanargmax(window)) if not np.isnan(window).all() else end - 1)
+    return np.unique(positions)
+
+
+def downsample_frame(df, x_column, y_column, n_out, method='lttb'):
+    """
+    Downsamples `df` (sorted by `x_column`) to at most `n_out` rows for plotting.
+    `method` is 'lttb' or 'minmax'. Rows with a missing y value are dropped first.
+    """
+    df = df.dropna(subset=[y_column])
+    if len(df) <= n_out:
+        return df
+
+    y = df[y_column].to_numpy(dtype=np.float64)
+    if method == 'minmax':
+        positions = minmax_indices(y, n_out)
+    else:
+        x = df[x_column]
+        if pd.api.types.is_datetime64_any_dtype(x):
+            x = x.astype('int64')
+        positions = lttb_indices(x.to_numpy(dtype=np.float64), y, n_out)
+    return df.iloc[positions]